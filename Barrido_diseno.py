@@ -0,0 +1,85 @@
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from math import pi
+
+import numpy as np
+
+from VortexHs import resolver_ala
+
+# Parámetros de la forma en planta que se barren
+PARAMETROS = ('SwA', 'Tpr', 'twist', 'DihA', 'b2', 'Croot')
+
+
+# ============================================================
+# COMBINACIONES DEL ESPACIO DE DISEÑO
+# ============================================================
+def combinaciones(**rangos):
+    """
+    Producto cartesiano de los valores dados para cada parámetro, p. ej.
+    combinaciones(SwA=[0, 0.5], Tpr=[0.4, 1]). Los parámetros que no se
+    dan toman el valor por defecto de resolver_ala.
+    Devuelve una lista de diccionarios, uno por diseño.
+    """
+    nombres = [p for p in PARAMETROS if p in rangos]
+    for p in rangos:
+        if p not in PARAMETROS:
+            raise ValueError("Parámetro desconocido: %s" % p)
+    return [dict(zip(nombres, valores))
+            for valores in itertools.product(*(rangos[p] for p in nombres))]
+
+
+def _resolver_diseno(args):
+    # Se ejecuta en cada proceso; solo se devuelven los resultados del barrido
+    diseno, opciones = args
+    res = resolver_ala(**diseno, **opciones)
+    return res['CL'], res['CM'], res['Di'], res['L_franja']
+
+
+# ============================================================
+# BARRIDO EN PARALELO
+# ============================================================
+def barrido(disenos, archivo='barrido_ala.npz', procesos=None, **opciones):
+    """
+    Resuelve todos los diseños en un grupo de procesos y guarda un único
+    archivo .npz por columnas: un vector por parámetro, CL, CM, Di y la
+    carga por franja L_franja de forma (diseños, Ny-1). Las opciones
+    (Vinf, Alpha, rho, Nx, Ny, Solver) son comunes a todos los diseños.
+    Devuelve el diccionario de columnas.
+    """
+    n = len(disenos)
+    procesos = procesos or os.cpu_count() or 1
+
+    # Valores de cada parámetro; NaN si el diseño usa el de por defecto
+    columnas = {p: np.array([np.nan if d.get(p) is None else d[p] for d in disenos],
+                            dtype=float) for p in PARAMETROS}
+
+    tareas = [(d, opciones) for d in disenos]
+    bloque = max(1, n // (4 * procesos))
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        resultados = list(ejecutor.map(_resolver_diseno, tareas, chunksize=bloque))
+
+    columnas['CL'] = np.array([r[0] for r in resultados])
+    columnas['CM'] = np.array([r[1] for r in resultados])
+    columnas['Di'] = np.array([r[2] for r in resultados])
+    columnas['L_franja'] = np.array([r[3] for r in resultados])
+
+    if archivo is not None:
+        np.savez(archivo, **columnas)
+    return columnas
+
+
+if __name__ == "__main__":
+    # ============================================================
+    # EJEMPLO: FLECHA, ESTRECHAMIENTO Y TORSIÓN
+    # ============================================================
+    disenos = combinaciones(SwA=np.radians([0, 15, 30, 45]),
+                            Tpr=[0.4, 0.7, 1.0],
+                            twist=np.radians([-4, 0]))
+
+    columnas = barrido(disenos, 'barrido_ala.npz', Nx=5, Ny=9,
+                       Alpha=5 * (pi / 180))
+
+    mejor = np.argmax(columnas['CL'] ** 2 / columnas['Di'])
+    print("Diseños resueltos:", len(disenos))
+    print("Mejor CL^2/Di:", {p: columnas[p][mejor] for p in ('SwA', 'Tpr', 'twist')})
@@ -0,0 +1,271 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import contextlib
+import importlib.util
+from math import pi
+
+import numpy as np
+
+from Graficos import pyplot, terminar
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+BASE = os.path.join(DIRECTORIO, 'benchmark_base.json')
+
+
+def _modulo(archivo, nombre):
+    # Para los scripts cuyo nombre no es un identificador válido
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# ============================================================
+# CASOS: cada uno resuelve un tamaño y devuelve (valor, error)
+# ============================================================
+def caso_ala(Ny):
+    """VortexHs: ensamblaje y solución del ala de ejemplo con Ny estaciones."""
+    from VortexHs import resolver_ala
+    return resolver_ala(Nx=5, Ny=Ny)['CL'], None
+
+
+def caso_perfil_camber(n):
+    """Perfil_camber: CL contra 2π(α + 2e/c)."""
+    from Perfil_camber import resolver_perfil
+    res = resolver_perfil(n=n, alpha=np.radians(2))
+    return res['CL'], abs(res['CL'] - res['CL_analit']) / abs(res['CL_analit'])
+
+
+def caso_sensibilidades(n):
+    """Perfil_camber: gradientes adjuntos de CL, Cm y ΔCp contra diferencias finitas."""
+    from Perfil_camber import geometria_perfil, sensibilidades_perfil, verificar_sensibilidades
+    x, eta = geometria_perfil(n, 1.0, 0.1)[:2]
+    alpha = np.radians(2)
+    error = verificar_sensibilidades(x, eta, alpha, pesos_dcp=np.ones(n - 1))
+    return sensibilidades_perfil(x, eta, alpha)['dCL_dalpha'], error
+
+
+def caso_perfil_plano(N):
+    """Perfil_plano: cl de la placa plana contra 2π sin(α)."""
+    from Perfil_plano import resolver_placa_plana
+    cl_ref = 2 * pi * np.sin(np.radians(5))
+    cl = resolver_placa_plana(N, alfa=np.radians(5))['cl']
+    return cl, abs(cl - cl_ref) / cl_ref
+
+
+def caso_cilindro(n):
+    """
+    Liftingcylinder: campo n x n y Γ sobre el cilindro, interpolado desde
+    ese campo, contra el impuesto.
+    """
+    from Liftingcylinder import cylinder, bases_cilindro
+    from FlujoPotencial import circulacion_muestreada
+    # Sin la caché de campos base cada repetición mide la evaluación del campo
+    bases_cilindro.cache_clear()
+    Gam = 2 * pi
+    with contextlib.redirect_stdout(io.StringIO()):
+        campo = cylinder(Gam, 'benchmark', graficar=False, n=n)
+    # cylinder() integra sobre la velocidad exacta; el error debe depender de la malla
+    Gamma = -circulacion_muestreada(campo['X'], campo['Y'], campo['vx'], campo['vy'],
+                                    campo['xc'], campo['yc'])
+    return Gamma, abs(abs(Gamma) - Gam) / Gam
+
+
+def caso_circulacion(n):
+    """Circulación: campo del vórtice n x n y Γ por trapecios contra 2π."""
+    circ = _modulo('Circulación.py', 'circulacion')
+    X = np.linspace(-3, 3, n)
+    circ.campo_vortice(-2 * pi, X, X)
+    Gamma = circ.circulacion_cilindro(-2 * pi, nc=n)['Gamma']
+    return Gamma, abs(abs(Gamma) - 2 * pi) / (2 * pi)
+
+
+def caso_rankine(n):
+    """Óvalo de Rankine en una malla n x n; error: velocidad en el estancamiento."""
+    ovalo = _modulo('Rankine (ellipsoid).py', 'rankine_ovalo')
+    m, Uinf = 5.0, 5.0
+    X = np.linspace(-4, 4, n)
+    x, y = np.meshgrid(X, X)
+    ovalo.ovalo_rankine(x, y, m, Uinf)
+    xss = ovalo.contorno_ovalo(m, Uinf)[0]
+    vloc = ovalo.ovalo_rankine(np.array([xss]), np.array([0.0]), m, Uinf)[2][0]
+    return xss, vloc / Uinf
+
+
+def caso_semicuerpo(n):
+    """Semicuerpo de Rankine en una malla n x n; error: velocidad en el estancamiento."""
+    from Rankine_halfBody import semicuerpo_rankine, estancamiento_semicuerpo
+    m, Uinf = 5.0, 5.0
+    X = np.linspace(-4, 4, n)
+    x, y = np.meshgrid(X, X)
+    semicuerpo_rankine(x, y, m, Uinf)
+    xss = estancamiento_semicuerpo(m, Uinf)
+    vloc = semicuerpo_rankine(np.array([xss]), np.array([0.0]), m, Uinf)[2][0]
+    return xss, vloc / Uinf
+
+
+# Escalera de tamaños de cada caso
+CASOS = {
+    'ala': (caso_ala, [5, 11, 21, 41, 81]),
+    'perfil_camber': (caso_perfil_camber, [10, 50, 100, 200, 400]),
+    'sensibilidades': (caso_sensibilidades, [10, 25, 50]),
+    'perfil_plano': (caso_perfil_plano, [5, 50, 200, 800, 10000]),
+    'cilindro': (caso_cilindro, [50, 100, 200, 400]),
+    'circulacion': (caso_circulacion, [30, 100, 300]),
+    'rankine': (caso_rankine, [100, 200, 400, 800]),
+    'semicuerpo': (caso_semicuerpo, [100, 200, 400, 800]),
+}
+
+
+# ============================================================
+# MEDICIÓN
+# ============================================================
+def medir(funcion, tam, repeticiones=3):
+    """
+    Tiempo (el mínimo de las repeticiones), memoria máxima asignada
+    (tracemalloc, en una corrida aparte) y resultado de funcion(tam).
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        valor, error = funcion(tam)
+        tiempos.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    funcion(tam)
+    memoria = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dict(tiempo=min(tiempos), memoria=memoria, valor=float(valor),
+                error=None if error is None else float(error))
+
+
+def correr(casos=None, repeticiones=3, rapido=False):
+    """
+    Corre la escalera de tamaños de cada caso (sólo los dos primeros con
+    rapido=True). Para los casos sin referencia analítica el error es el
+    cambio relativo respecto del tamaño más fino de la escalera completa
+    (con rapido=True queda en None).
+    Devuelve {caso: {tamaño: medición}} con claves de texto, como el JSON.
+    """
+    resultados = {}
+    for nombre in casos or CASOS:
+        funcion, tamanos = CASOS[nombre]
+        tamanos = tamanos[:2] if rapido else tamanos
+        res = {str(t): medir(funcion, t, repeticiones) for t in tamanos}
+
+        ref = res[str(tamanos[-1])]['valor']
+        for r in res.values():
+            if r['error'] is None and not rapido:
+                r['error'] = abs(r['valor'] - ref) / (abs(ref) or 1.0)
+        resultados[nombre] = res
+    return resultados
+
+
+def pendiente(res):
+    """Exponente de escalamiento del tiempo: ajuste de log(t) contra log(tamaño)."""
+    tam = np.array([float(t) for t in res])
+    t = np.array([r['tiempo'] for r in res.values()])
+    if len(tam) < 2:
+        return np.nan
+    return np.polyfit(np.log(tam), np.log(np.maximum(t, 1e-9)), 1)[0]
+
+
+# ============================================================
+# COMPARACIÓN CON LA LÍNEA BASE
+# ============================================================
+def comparar(resultados, base, tol_tiempo=1.5, tol_memoria=1.25, tol_error=1e-6):
+    """
+    Regresiones respecto de la línea base: tiempo mayor que tol_tiempo
+    veces el de la base (y 10 ms más, para no reaccionar al ruido),
+    memoria mayor que tol_memoria veces la base (más 1 MB) o error mayor
+    que el de la base. Devuelve una lista de mensajes (vacía si no hay).
+    """
+    regresiones = []
+    for nombre, res in resultados.items():
+        for tam, r in res.items():
+            b = base.get(nombre, {}).get(tam)
+            if b is None:
+                continue
+            if r['tiempo'] > tol_tiempo * b['tiempo'] + 0.01:
+                regresiones.append("%s[%s]: tiempo %.4f s > base %.4f s"
+                                   % (nombre, tam, r['tiempo'], b['tiempo']))
+            if r['memoria'] > tol_memoria * b['memoria'] + 2**20:
+                regresiones.append("%s[%s]: memoria %.1f MB > base %.1f MB"
+                                   % (nombre, tam, r['memoria'] / 2**20, b['memoria'] / 2**20))
+            if r['error'] is None or b['error'] is None:
+                continue
+            if r['error'] > b['error'] * (1 + tol_error) + 1e-12:
+                regresiones.append("%s[%s]: error %.3e > base %.3e"
+                                   % (nombre, tam, r['error'], b['error']))
+    return regresiones
+
+
+def graficar_escalamiento(resultados, archivo=None):
+    plt = pyplot(archivo is not None)
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(11, 4.5))
+    for nombre, res in resultados.items():
+        tam = [float(t) for t in res]
+        ax1.loglog(tam, [r['tiempo'] for r in res.values()], 'o-', label=nombre)
+        ax2.loglog(tam, [max(r['error'] or 0, 1e-16) for r in res.values()], 'o-', label=nombre)
+    ax1.set_xlabel('Tamaño (Ny, n, N)')
+    ax1.set_ylabel('Tiempo [s]')
+    ax2.set_xlabel('Tamaño (Ny, n, N)')
+    ax2.set_ylabel('Error relativo')
+    for ax in (ax1, ax2):
+        ax.grid(True, which='both', alpha=0.3)
+    ax1.legend()
+    terminar(fig, archivo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los solvers")
+    parser.add_argument('casos', nargs='*',
+                        help="casos a correr (todos por defecto): " + ", ".join(CASOS))
+    parser.add_argument('--rapido', action='store_true', help="sólo los dos primeros tamaños")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--base', default=BASE, help="archivo JSON de la línea base")
+    parser.add_argument('--guardar', action='store_true', help="guardar como nueva línea base")
+    parser.add_argument('--tol-tiempo', type=float, default=1.5)
+    parser.add_argument('--tol-memoria', type=float, default=1.25)
+    parser.add_argument('--grafica', help="guardar las curvas de escalamiento en este archivo")
+    args = parser.parse_args()
+    for nombre in args.casos:
+        if nombre not in CASOS:
+            parser.error("caso desconocido: %s" % nombre)
+
+    resultados = correr(args.casos, args.repeticiones, args.rapido)
+
+    print("%-14s %8s %12s %12s %12s" % ("caso", "tamaño", "tiempo [s]", "memoria [MB]", "error"))
+    for nombre, res in resultados.items():
+        for tam, r in res.items():
+            error = '-' if r['error'] is None else '%.3e' % r['error']
+            print("%-14s %8s %12.5f %12.2f %12s"
+                  % (nombre, tam, r['tiempo'], r['memoria'] / 2**20, error))
+        print("%-14s pendiente del tiempo: %.2f" % ('', pendiente(res)))
+
+    if args.grafica:
+        graficar_escalamiento(resultados, args.grafica)
+
+    if args.guardar:
+        base = {}
+        if os.path.exists(args.base):
+            with open(args.base) as f:
+                base = json.load(f)
+        base.update(resultados)
+        with open(args.base, 'w') as f:
+            json.dump(base, f, indent=1)
+        print("Línea base guardada en", args.base)
+    elif os.path.exists(args.base):
+        with open(args.base) as f:
+            regresiones = comparar(resultados, json.load(f), args.tol_tiempo,
+                                   args.tol_memoria)
+        for r in regresiones:
+            print("REGRESIÓN:", r)
+        if regresiones:
+            sys.exit(1)
+        print("Sin regresiones respecto de", args.base)
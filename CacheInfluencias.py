@@ -0,0 +1,108 @@
+import os
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Cambiar si cambia el núcleo de Biot-Savart o el formato de las entradas
+VERSION = b'herraduras-v1'
+
+ARCHIVOS = ('a_coeffs', 'b_coeffs', 'lu', 'piv')
+
+
+# ============================================================
+# CACHÉ EN DISCO DE MATRICES DE INFLUENCIA
+# ============================================================
+class CacheInfluencias:
+    """
+    Guarda a_coeffs, b_coeffs y la factorización LU de a_coeffs en archivos
+    .npy que se leen con memoria mapeada. La clave es un hash de la
+    geometría del enrejado (vértices de las herraduras, que incluyen la
+    estela, puntos de colocación, normales y si se usa la imagen
+    simétrica). Cuando el tamaño total supera tam_max bytes se eliminan las
+    entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, directorio='.cache_influencias', tam_max=2**31):
+        self.directorio = directorio
+        self.tam_max = tam_max
+        os.makedirs(directorio, exist_ok=True)
+
+    @staticmethod
+    def clave(HS, xcp, ycp, zcp, unvx, unvy, unvz, simetria=True):
+        """Hash (hexadecimal) de la geometría que define las matrices."""
+        h = hashlib.sha256(VERSION)
+        h.update(b'sim' if simetria else b'completa')
+        for arr in (HS, xcp, ycp, zcp, unvx, unvy, unvz):
+            arr = np.ascontiguousarray(arr, dtype=np.float64)
+            h.update(str(arr.shape).encode())
+            h.update(arr.tobytes())
+        return h.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave)
+
+    def cargar(self, clave):
+        """
+        Devuelve a_coeffs, b_coeffs y (lu, piv) mapeados en memoria, o None
+        si la clave no está. Se mapean en copia-en-escritura: lu_solve no
+        acepta un piv de solo lectura y así el archivo nunca se modifica.
+        """
+        ruta = self._ruta(clave)
+        try:
+            datos = [np.load(os.path.join(ruta, f + '.npy'), mmap_mode='c')
+                     for f in ARCHIVOS]
+        except FileNotFoundError:
+            return None
+        # Marca de último uso para el desalojo LRU
+        os.utime(ruta)
+        a_coeffs, b_coeffs, lu, piv = datos
+        return a_coeffs, b_coeffs, (lu, piv)
+
+    def guardar(self, clave, a_coeffs, b_coeffs, lu):
+        """
+        Escribe una entrada nueva. Se escribe en un directorio temporal y se
+        renombra, así otro proceso nunca ve una entrada a medias.
+        """
+        ruta = self._ruta(clave)
+        if os.path.isdir(ruta):
+            os.utime(ruta)
+            return
+        tmp = tempfile.mkdtemp(dir=self.directorio, prefix='.tmp-')
+        for nombre, arr in zip(ARCHIVOS, (a_coeffs, b_coeffs, lu[0], lu[1])):
+            np.save(os.path.join(tmp, nombre + '.npy'), arr)
+        try:
+            os.rename(tmp, ruta)
+        except OSError:
+            # Otro proceso guardó la misma entrada primero
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.desalojar()
+
+    def entradas(self):
+        """Lista de (último uso, tamaño en bytes, ruta) de cada entrada."""
+        lista = []
+        for nombre in os.listdir(self.directorio):
+            ruta = self._ruta(nombre)
+            if nombre.startswith('.') or not os.path.isdir(ruta):
+                continue
+            tam = sum(os.path.getsize(os.path.join(ruta, f))
+                      for f in os.listdir(ruta))
+            lista.append((os.path.getmtime(ruta), tam, ruta))
+        return lista
+
+    def desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar bajo tam_max."""
+        lista = sorted(self.entradas())
+        total = sum(e[1] for e in lista)
+        # Siempre se conserva la entrada más reciente
+        for uso, tam, ruta in lista[:-1]:
+            if total <= self.tam_max:
+                break
+            shutil.rmtree(ruta, ignore_errors=True)
+            total -= tam
+
+    def limpiar(self):
+        """Borra todas las entradas."""
+        for uso, tam, ruta in self.entradas():
+            shutil.rmtree(ruta, ignore_errors=True)
@@ -1,101 +1,138 @@
 # ==========================================================
-#   CÁLCULO DE LA CIRCULACIÓN (Γ) 
+#   CÁLCULO DE LA CIRCULACIÓN (Γ)
 # ==========================================================
 # Este script calcula la circulación de un campo de vórtice
 # ==========================================================
 
 import numpy as np
-import matplotlib.pyplot as plt 
-from math import pi 
-from scipy.interpolate import RectBivariateSpline   # (aunque aquí no se usa directamente)
+from math import pi
 
-# --------------------------------------------
-# Definición de la malla de puntos del dominio
-# --------------------------------------------
-n = 30                   # Número de puntos por eje en la grilla
-maxv = 3                 # Límite máximo del dominio
-minv = -3                # Límite mínimo del dominio
+from FlujoPotencial import Flujo, Vortice
+from Graficos import pyplot, terminar
 
-X = np.linspace(minv, maxv, n)   # Coordenadas X del dominio
-Y = np.linspace(minv, maxv, n)   # Coordenadas Y del dominio
-x, y = np.meshgrid(X, Y)         # Malla bidimensional (X,Y)
-
-# --------------------------------------------
-# Definición del cilindro
-# --------------------------------------------
-nc = 30                   # Número de puntos sobre la circunferencia
-r = 1                     # Radio del cilindro
+# np.trapz pasó a llamarse np.trapezoid en NumPy 2
+trapz = getattr(np, 'trapezoid', None) or np.trapz
 
-theta = np.linspace(0, 2*pi, nc)   # Ángulo polar (0 a 2π)
-dtheta = theta[1] - theta[0]       # Incremento angular (Δθ)
-xc = r * np.cos(theta)             # Coordenadas X de la circunferencia
-yc = r * np.sin(theta)             # Coordenadas Y de la circunferencia
 
 # --------------------------------------------
 # Campo de velocidades inducido por circulación
 # --------------------------------------------
-Gam = -2.0                        # Circulación impuesta (valor negativo)
-vx = np.zeros((n,n))              # Componente de velocidad en X
-vy = np.zeros((n,n))              # Componente de velocidad en Y
-
-# Cálculo de la velocidad inducida en cada punto (xi, yi)
-for i in range(n):
-  xi = X[i]
-  for j in range(n):
-    yi = Y[j]
-    rxy = xi**2 + yi**2           # Radio cuadrado desde el origen
-    fact = 2*pi*rxy               # Factor común para evitar repetición
-    vx[j,i] = (Gam*yi)/fact       # Componente x de la velocidad inducida
-    vy[j,i] = -(Gam*xi)/fact      # Componente y de la velocidad inducida
+def campo_vortice(Gam, X, Y):
+  """
+  Velocidad inducida por un vórtice de circulación Gam (positiva en
+  sentido horario) en el origen sobre la malla definida por los vectores
+  X, Y. Devuelve vx, vy de forma (len(Y), len(X)) como arreglos
+  enmascarados: el punto singular en el origen, si está en la malla, queda
+  enmascarado (con valor 0) en lugar de inf/NaN.
+  """
+  x, y = np.meshgrid(X, Y)
+  campo = Flujo([Vortice(-Gam)]).campo(x, y, ('u', 'v', 'singular'), relleno=0.0)
+  vx = np.ma.masked_array(campo['u'], mask=campo['singular'])   # Componente x de la velocidad inducida
+  vy = np.ma.masked_array(campo['v'], mask=campo['singular'])   # Componente y de la velocidad inducida
+  return vx, vy
+
 
 # --------------------------------------------
-# Velocidad sobre el contorno
+# Campo de alta resolución en disco
 # --------------------------------------------
-fact = 2*pi*r**2
-vfxc = (Gam*yc)/fact              # Componente tangencial en X sobre el cilindro
-vfyc = -(Gam*xc)/fact             # Componente tangencial en Y sobre el cilindro
+def campo_vortice_disco(Gam, X, Y, directorio, salidas=('u', 'v', 'Cp', 'singular'),
+                        **opciones):
+  """
+  El mismo campo de campo_vortice() evaluado por franjas y escrito en
+  directorio como arreglos .npy mapeados en memoria (ver
+  Flujo.campo_en_disco; se reanuda si se interrumpe). Cp se toma respecto
+  a una velocidad de referencia unitaria.
+  """
+  return Flujo([Vortice(-Gam)], U_ref=1.0).campo_en_disco(X, Y, directorio, salidas,
+                                                          **opciones)
 
-# Derivadas del contorno para integración (dx, dy)
-dxc = -r * np.sin(theta) * dtheta
-dyc =  r * np.cos(theta) * dtheta
 
 # --------------------------------------------
-# Integración de la circulación (método trapecio)
+# Circulación sobre el contorno del cilindro
 # --------------------------------------------
-int1 = np.trapz(vfxc, xc)
-int2 = np.trapz(vfyc, yc)
-Gamma = -(int1 + int2)            # Circulación total calculada
+def circulacion_cilindro(Gam, r=1, nc=30):
+  """
+  Integra la velocidad del vórtice sobre una circunferencia de radio r con
+  nc puntos, por trapecios y por sumatoria discreta. Devuelve un
+  diccionario con el contorno, las velocidades sobre él, Gamma y Gammap.
+  """
+  theta = np.linspace(0, 2*pi, nc)   # Ángulo polar (0 a 2π)
+  dtheta = theta[1] - theta[0]       # Incremento angular (Δθ)
+  xc = r * np.cos(theta)             # Coordenadas X de la circunferencia
+  yc = r * np.sin(theta)             # Coordenadas Y de la circunferencia
 
-# --------------------------------------------
-# Integración aproximada por sumatoria discreta
-# --------------------------------------------
-intap1 = 0.0
-intap2 = 0.0
+  # Velocidad sobre el contorno
+  fact = 2*pi*r**2
+  vfxc = (Gam*yc)/fact              # Componente tangencial en X sobre el cilindro
+  vfyc = -(Gam*xc)/fact             # Componente tangencial en Y sobre el cilindro
 
-for i in range(nc):
-  intap1 += vfxc[i] * dxc[i]
-  intap2 += vfyc[i] * dyc[i]
-Gammap = -(intap1 + intap2)       # Circulación aproximada
+  # Derivadas del contorno para integración (dx, dy)
+  dxc = -r * np.sin(theta) * dtheta
+  dyc =  r * np.cos(theta) * dtheta
+
+  # Integración de la circulación (método trapecio)
+  int1 = trapz(vfxc, xc)
+  int2 = trapz(vfyc, yc)
+  Gamma = -(int1 + int2)            # Circulación total calculada
+
+  # Integración aproximada por sumatoria discreta
+  intap1 = 0.0
+  intap2 = 0.0
+
+  for i in range(nc):
+    intap1 += vfxc[i] * dxc[i]
+    intap2 += vfyc[i] * dyc[i]
+  Gammap = -(intap1 + intap2)       # Circulación aproximada
+
+  return dict(xc=xc, yc=yc, vfxc=vfxc, vfyc=vfyc, dxc=dxc, dyc=dyc,
+              Gamma=Gamma, Gammap=Gammap)
 
-# --------------------------------------------
-# Resultados en consola
-# --------------------------------------------
-print('gamma = ', Gamma)          # Resultado usando trapecio
-print('Gammap = ', Gammap)        # Resultado usando sumatoria
-print('Gammat = ', 2*pi)          # Valor teórico (para comparación)
 
 # --------------------------------------------
 # Visualización del campo de velocidades
 # --------------------------------------------
-Fig = plt.figure(0)
-ax = plt.axes()
-# ax.scatter(x,y, c='red', marker='o', s=4**2)   
-ax.quiver(x, y, vx, vy, color='black')           # Vectores del campo total
-plt.plot(xc, yc, 'bo')                           # Contorno del cilindro
-ax.quiver(xc, yc, vfxc, vfyc, color='blue')      # Vectores tangenciales en el contorno
-ax.quiver(xc, yc, dxc, dyc, color='green')       # Vectores diferenciales (dx, dy)
-plt.grid()
-plt.gca().set_aspect('equal', 'box')
-plt.show()                                       # Mostrar figura
-
-
+def graficar_circulacion(x, y, vx, vy, contorno, archivo=None):
+  plt = pyplot(archivo is not None)
+  Fig = plt.figure()
+  ax = plt.axes()
+  # ax.scatter(x,y, c='red', marker='o', s=4**2)
+  ax.quiver(x, y, vx, vy, color='black')           # Vectores del campo total
+  xc, yc = contorno['xc'], contorno['yc']
+  plt.plot(xc, yc, 'bo')                           # Contorno del cilindro
+  ax.quiver(xc, yc, contorno['vfxc'], contorno['vfyc'], color='blue')  # Vectores tangenciales en el contorno
+  ax.quiver(xc, yc, contorno['dxc'], contorno['dyc'], color='green')   # Vectores diferenciales (dx, dy)
+  plt.grid()
+  plt.gca().set_aspect('equal', 'box')
+  terminar(Fig, archivo)                           # Mostrar figura
+
+
+if __name__ == "__main__":
+  # --------------------------------------------
+  # Definición de la malla de puntos del dominio
+  # --------------------------------------------
+  n = 30                   # Número de puntos por eje en la grilla
+  maxv = 3                 # Límite máximo del dominio
+  minv = -3                # Límite mínimo del dominio
+
+  X = np.linspace(minv, maxv, n)   # Coordenadas X del dominio
+  Y = np.linspace(minv, maxv, n)   # Coordenadas Y del dominio
+  x, y = np.meshgrid(X, Y)         # Malla bidimensional (X,Y)
+
+  # --------------------------------------------
+  # Definición del cilindro
+  # --------------------------------------------
+  nc = 30                   # Número de puntos sobre la circunferencia
+  r = 1                     # Radio del cilindro
+
+  Gam = -2.0                # Circulación impuesta (valor negativo)
+  vx, vy = campo_vortice(Gam, X, Y)
+  contorno = circulacion_cilindro(Gam, r, nc)
+
+  # --------------------------------------------
+  # Resultados en consola
+  # --------------------------------------------
+  print('gamma = ', contorno['Gamma'])     # Resultado usando trapecio
+  print('Gammap = ', contorno['Gammap'])   # Resultado usando sumatoria
+  print('Gammat = ', 2*pi)                 # Valor teórico (para comparación)
+
+  graficar_circulacion(x, y, vx, vy, contorno)
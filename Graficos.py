@@ -0,0 +1,40 @@
+import sys
+
+
+# ============================================================
+# IMPORTACIÓN DIFERIDA DE MATPLOTLIB
+# ============================================================
+def pyplot(sin_pantalla=False):
+    """
+    Importa matplotlib.pyplot solo cuando se va a graficar, para que los
+    solvers se puedan importar en procesos por lotes sin pagar su costo.
+    Con sin_pantalla=True (y si pyplot aún no se había importado) se usa el
+    backend Agg, que no abre ventanas.
+    """
+    if sin_pantalla and 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def terminar(fig, archivo=None):
+    """
+    Muestra la figura, o si se da un archivo la guarda y la cierra sin
+    mostrarla.
+    """
+    plt = pyplot(archivo is not None)
+    if archivo is None:
+        plt.show()
+    else:
+        fig.savefig(archivo, dpi=150)
+        plt.close(fig)
+
+
+def dibujar_lineas(ax, lineas, color='C0', linewidth=1, **estilo):
+    """
+    Dibuja una lista de polilíneas (arreglos (puntos, 2), p. ej. las de
+    FlujoPotencial.polilineas) como una sola LineCollection.
+    """
+    from matplotlib.collections import LineCollection
+    ax.add_collection(LineCollection(lineas, colors=color, linewidths=linewidth, **estilo))
@@ -1,92 +1,232 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.interpolate import RectBivariateSpline
+
+from FlujoPotencial import (Flujo, Uniforme, Doblete, Vortice, circunferencias, circulacion,
+                            lineas_corriente, polilineas)
+from Graficos import pyplot, terminar, dibujar_lineas
 
 # Parameters
 U_inf = 1.0
 r = 1
 
-def cylinder(Gam, case):
-    # Check for Gamma
-    if Gam > 0:
-        Gam = -Gam
-    
-    # Grid
-    n = 200
-    xlim = 8
-    ylim = 8
+
+def flujo_cilindro(Gam):
+    """Uniform flow + doublet (cylinder of radius r) + vortex of circulation Gam."""
+    return Flujo([Uniforme(U_inf), Doblete(2*np.pi*U_inf*r**2), Vortice(Gam)])
+
+
+@functools.lru_cache(maxsize=8)
+def bases_cilindro(n=200, xlim=8, ylim=8, nc=100):
+    """
+    Basis fields of the cylinder, computed once per grid and cached. The
+    velocity is linear in U_inf and Gam: W = u - i v = U_inf*W1 + Gam*W2,
+    with W1 the uniform flow + doublet for U_inf = 1 and W2 the vortex
+    with Gam = 1. Besides W1, W2 on the n x n grid it keeps the terms of
+    |W / U_inf|^2 = A + g*B + g^2*C (g = Gam/U_inf) and the same on nc
+    points of the surface (angles ts, without repeating 2*pi).
+    The arrays are shared between calls and are read-only.
+    """
     X = np.linspace(-xlim, xlim, n)
     Y = np.linspace(-ylim, ylim, n)
     x, y = np.meshgrid(X, Y)
-    
-    # Velocity components
-    vx = U_inf - Gam/(2*np.pi) * y / (x**2 + y**2) + (y**2 - x**2)/((x**2 + y**2)**2)
-    vy = Gam/(2*np.pi) * x / (x**2 + y**2) - (2*y*x)/((x**2 + y**2)**2)
-    v_loc = np.sqrt(vx**2 + vy**2)
-    
+    ts = 2*np.pi*np.arange(nc)/nc
+    xs, ys = r*np.cos(ts), r*np.sin(ts)
+
+    def bases(x, y):
+        uno = Flujo([Uniforme(1.0), Doblete(2*np.pi*r**2)]).campo(x, y, ('u', 'v'))
+        vort = Flujo([Vortice(1.0)]).campo(x, y, ('u', 'v'))
+        W1 = uno['u'] - 1j*uno['v']
+        W2 = vort['u'] - 1j*vort['v']
+        return W1, W2, np.abs(W1)**2, 2*np.real(W1*np.conj(W2)), np.abs(W2)**2
+
+    W1, W2, A, B, C = bases(x, y)
+    _, _, As, Bs, Cs = bases(xs, ys)
+    base = dict(X=X, Y=Y, x=x, y=y, W1=W1, W2=W2, A=A, B=B, C=C,
+                ts=ts, As=As, Bs=Bs, Cs=Cs, xlim=xlim, ylim=ylim)
+    for valor in base.values():
+        if isinstance(valor, np.ndarray):
+            valor.setflags(write=False)
+    return base
+
+
+def campo_cilindro(Gam, n=200, xlim=8, ylim=8):
+    """
+    Velocity and pressure field of the lifting cylinder on an n x n grid,
+    combined from the cached basis fields. Returns a dict with the grid,
+    vx, vy, v_loc and Cp.
+    """
+    base = bases_cilindro(n, xlim, ylim)
+
+    # Velocity components: uniform flow + doublet + vortex
+    W = U_inf*base['W1'] + Gam*base['W2']
+    vx, vy = W.real, -W.imag
+    v_loc = np.abs(W)
+
     # Pressure
     Cp = 1.0 - (v_loc/U_inf)**2
-    
-    # Circulation calculation
-    
-    # Cylinder geometry
-    nc = 100
-    theta = np.linspace(0, 2*np.pi, nc)
-    xc = r * np.cos(theta)
-    yc = r * np.sin(theta)
-    
-    # Interpolation
-    itpvx = RectBivariateSpline(X, Y, vx)
-    itpvy = RectBivariateSpline(X, Y, vy)
-    
-    # Ealuation
-    vfxc = itpvx.ev(yc, xc)
-    vfyc = itpvy.ev(yc, xc)
-    
-    # Integration
-    Int1 = np.trapz(vfxc, xc)
-    Int2 = np.trapz(vfyc, yc)
-
-    
-    Gamma = - Int1 -  Int2
-    
+    return dict(X=base['X'], Y=base['Y'], x=base['x'], y=base['y'], vx=vx, vy=vy,
+                v_loc=v_loc, Cp=Cp, xlim=xlim, ylim=ylim, Gam=Gam)
+
+
+def estancamiento_cilindro(Gam, U=U_inf):
+    """
+    Stagnation points of U_inf*W1 + Gam*W2, roots of
+    U z^2 - i Gam/(2 pi) z - U r^2 = 0. Returns xs, ys of shape (..., 2);
+    a root inside the cylinder (|Gam| > 4 pi U r) is NaN.
+    """
+    Gam, U = np.broadcast_arrays(np.asarray(Gam, dtype=float), np.asarray(U, dtype=float))
+    b = 1j*Gam/(2*np.pi)
+    raiz = np.sqrt(4*U**2*r**2 - (Gam/(2*np.pi))**2 + 0j)
+    z = np.stack([(b + raiz)/(2*U), (b - raiz)/(2*U)], axis=-1)
+    z[np.abs(z) < r*(1 - 1e-12)] = complex(np.nan, np.nan)
+    return z.real, z.imag
+
+
+def barrido_cilindro(Gams, U=U_inf, n=200, xlim=8, ylim=8, salidas=('Cp',), rho=1.225,
+                     nc=100, hilos=None, memoria_max=2**27):
+    """
+    Sweep of the lifting cylinder over many values of Gam (counterclockwise
+    positive, as in flujo_cilindro) and U, broadcast together, by linear
+    combination of the cached basis fields. For each case it gives the
+    lift per unit span by Kutta-Joukowski (L_KJ = -rho U Gam) and by
+    integrating the surface pressure (L_presion), cl, and the stagnation
+    points (xs, ys); the fields in salidas (vx, vy, v_loc, Cp) are stacked
+    as (cases, n, n). Cases are computed in blocks of about memoria_max
+    bytes per field; with hilos > 1 the blocks are spread over a pool of
+    threads (NumPy releases the GIL in the array operations).
+    """
+    Gams, U = np.broadcast_arrays(np.asarray(Gams, dtype=float), np.asarray(U, dtype=float))
+    Gams, U = Gams.ravel(), U.ravel()
+    k = len(Gams)
+    g = Gams/U
+    base = bases_cilindro(n, xlim, ylim, nc)
+
+    # Surface pressure and lift: -1/2 rho U^2 r * integral of Cp sin(t) dt
+    Cps = 1.0 - base['As'] - g[:, None]*base['Bs'] - g[:, None]**2*base['Cs']
+    L_presion = -0.5*rho*U**2*r*(2*np.pi/nc)*(Cps @ np.sin(base['ts']))
+    L_KJ = -rho*U*Gams
+    xs, ys = estancamiento_cilindro(Gams, U)
+
+    res = dict(Gam=Gams, U=U, L_KJ=L_KJ, L_presion=L_presion,
+               cl=L_presion/(0.5*rho*U**2*2*r), xs=xs, ys=ys, X=base['X'], Y=base['Y'])
+    for s in salidas:
+        res[s] = np.empty((k, n, n))
+
+    def bloque(i0, i1):
+        Ub, Gb, gb = U[i0:i1, None, None], Gams[i0:i1, None, None], g[i0:i1, None, None]
+        if 'vx' in salidas or 'vy' in salidas:
+            W = Ub*base['W1'] + Gb*base['W2']
+            if 'vx' in salidas:
+                res['vx'][i0:i1] = W.real
+            if 'vy' in salidas:
+                res['vy'][i0:i1] = -W.imag
+        if 'v_loc' in salidas or 'Cp' in salidas:
+            V2 = base['A'] + gb*base['B'] + gb**2*base['C']
+            if 'v_loc' in salidas:
+                res['v_loc'][i0:i1] = Ub*np.sqrt(V2)
+            if 'Cp' in salidas:
+                res['Cp'][i0:i1] = 1.0 - V2
+
+    paso = max(1, int(memoria_max // (16*n*n)))
+    tramos = [(i0, min(i0 + paso, k)) for i0 in range(0, k if salidas else 0, paso)]
+    if hilos and hilos > 1:
+        with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            list(ejecutor.map(lambda t: bloque(*t), tramos))
+    else:
+        for t in tramos:
+            bloque(*t)
+    return res
+
+
+def circulation(Gam, radii=r, nc=100):
+    """
+    Circulation (clockwise positive, as printed by cylinder) on circles of
+    the given radii around the cylinder, from the exact velocity on each
+    contour. Returns the contours xc, yc (radii..., nc) and Gamma.
+    """
+    xc, yc = circunferencias(radii, nc)
+    return xc, yc, -circulacion(flujo_cilindro(Gam), xc, yc)
+
+
+def cylinder(Gam, case, graficar=True, n=200):
+    """
+    Circulation on the cylinder surface and, unless n is None, the n x n
+    field of campo_cilindro (needed for the plots).
+    """
+    # Check for Gamma
+    if Gam > 0:
+        Gam = -Gam
+
+    # Circulation on the cylinder contour, without the grid
+    xc, yc, Gamma = circulation(Gam, r, nc=100)
+    Gamma = float(Gamma)
+
     print(f"Gamma for {case}  = {Gamma}\n")
-    
-    # Plotting
-    
-    # Velocity field
-    fig1 = plt.figure(0)
-    
+
+    campo = {} if n is None else campo_cilindro(Gam, n)
+    campo.update(xc=xc, yc=yc, Gamma=Gamma)
+    if graficar:
+        graficar_velocidad(campo, case)
+        graficar_presion(campo, case)
+    return campo
+
+
+# Velocity field
+def graficar_velocidad(campo, case, archivo=None):
+    plt = pyplot(archivo is not None)
+    fig1 = plt.figure()
+
     ax = plt.axes()
-    speed = plt.contourf(x, y, v_loc, levels = np.linspace(0.0, 5.0, 100), extend = "both", cmap = "viridis")
+    speed = plt.contourf(campo['x'], campo['y'], campo['v_loc'],
+                         levels = np.linspace(0.0, 5.0, 100), extend = "both", cmap = "viridis")
     cbar = plt.colorbar(speed)
     #ax.quiver(x, y, vx, vy, color = "white")
-    plt.streamplot(x, y, vx, vy, density = 2, linewidth = 1, arrowsize = 1, arrowstyle = "->")
+    # Streamlines traced on the exact velocity from seeds upstream
+    xlim, ylim = campo['xlim'], campo['ylim']
+    y0 = np.linspace(-ylim, ylim, 60)
+    lineas = lineas_corriente(flujo_cilindro(campo['Gam']), -xlim*np.ones_like(y0), y0,
+                              longitud=8*xlim, paso=0.05*xlim,
+                              cuerpo=lambda x, y: x**2 + y**2 < r**2,
+                              limites=(-xlim, xlim, -ylim, ylim))
+    dibujar_lineas(ax, polilineas(lineas))
     plt.title(f"Velocity field for {case}")
-    plt.plot(xc, yc, label = "Cylinder", color = "black")
-    plt.xlim(-xlim, xlim)
-    plt.ylim(-ylim, ylim)
+    plt.plot(campo['xc'], campo['yc'], label = "Cylinder", color = "black")
+    plt.xlim(-campo['xlim'], campo['xlim'])
+    plt.ylim(-campo['ylim'], campo['ylim'])
     plt.legend()
     plt.grid()
     ax.set_aspect("equal")
-    plt.show()
-    
-    # Pressure field
-    fig2 = plt.figure(0)
-    
+    terminar(fig1, archivo)
+
+
+# Pressure field
+def graficar_presion(campo, case, archivo=None):
+    plt = pyplot(archivo is not None)
+    fig2 = plt.figure()
+
     ax = plt.axes()
-    cp = plt.contourf(x, y, Cp, levels = np.linspace(-2.0, 1.0, 100), extend = "both", cmap = "coolwarm")
+    cp = plt.contourf(campo['x'], campo['y'], campo['Cp'],
+                      levels = np.linspace(-2.0, 1.0, 100), extend = "both", cmap = "coolwarm")
     cbar = plt.colorbar(cp)
     plt.title(f"Cp field for {case}")
-    plt.plot(xc, yc, label = "Cylinder", color = "black")
-    plt.xlim(-xlim, xlim)
-    plt.ylim(-ylim, ylim)
+    plt.plot(campo['xc'], campo['yc'], label = "Cylinder", color = "black")
+    plt.xlim(-campo['xlim'], campo['xlim'])
+    plt.ylim(-campo['ylim'], campo['ylim'])
     plt.legend()
     plt.grid()
     ax.set_aspect("equal")
-    plt.show()
+    terminar(fig2, archivo)
+
+
+if __name__ == "__main__":
+    # Sweep: lift and stagnation points for many circulations at once
+    sweep = barrido_cilindro(np.linspace(-8*np.pi, 8*np.pi, 2001), salidas=())
+    print("Sweep of", len(sweep['Gam']), "circulations: max |L_KJ - L_pressure| =",
+          np.max(np.abs(sweep['L_KJ'] - sweep['L_presion'])), "\n")
 
-cylinder(0, "Non-lifting Cylinder")
-cylinder(4 * np.pi * U_inf * r, "One Stagnation Point")
-cylinder(4 * np.pi * U_inf * r * 0.5, "Two Stagnation points")
-cylinder(4 * np.pi * U_inf * r * 2, "Unphysical Condition")
\ No newline at end of file
+    cylinder(0, "Non-lifting Cylinder")
+    cylinder(4 * np.pi * U_inf * r, "One Stagnation Point")
+    cylinder(4 * np.pi * U_inf * r * 0.5, "Two Stagnation points")
+    cylinder(4 * np.pi * U_inf * r * 2, "Unphysical Condition")
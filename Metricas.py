@@ -0,0 +1,98 @@
+import json
+import time
+import tracemalloc
+import contextlib
+from collections import Counter
+
+# Contadores globales que incrementan las funciones instrumentadas (p. ej.
+# HSvel_lote); cada etapa guarda cuánto aumentaron mientras estuvo abierta.
+contadores = Counter()
+
+
+def contar(nombre, n=1):
+    contadores[nombre] += n
+
+
+# ============================================================
+# MÉTRICAS POR ETAPA
+# ============================================================
+class Metricas:
+    """
+    Registro de duración, llamadas y memoria máxima asignada de cada etapa
+    de un cálculo. Cada etapa se mide con `with metricas.etapa('nombre'):`;
+    las llamadas son el aumento de `contadores` dentro de la etapa y la
+    memoria es el pico de tracemalloc por encima de lo asignado al entrar
+    (con memoria=False no se activa tracemalloc, que hace más lento el
+    cálculo). Si se da `archivo`, cada etapa se agrega al terminar como
+    una línea JSON con la `etiqueta` de la corrida. Las etapas no se
+    anidan (cada una reinicia el pico de tracemalloc).
+    """
+
+    def __init__(self, memoria=True, archivo=None, etiqueta=None):
+        self.memoria = memoria
+        self.archivo = archivo
+        self.etiqueta = etiqueta
+        self.etapas = []
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        antes = Counter(contadores)
+        medir_memoria = self.memoria
+        if medir_memoria:
+            detener = not tracemalloc.is_tracing()
+            if detener:
+                tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro = dict(etapa=nombre, tiempo=time.perf_counter() - t0)
+            if medir_memoria:
+                registro['memoria'] = max(0, tracemalloc.get_traced_memory()[1] - base)
+                if detener:
+                    tracemalloc.stop()
+            registro['llamadas'] = dict(Counter(contadores) - antes)
+            self.etapas.append(registro)
+            if self.archivo is not None:
+                self.escribir(self.archivo, [registro])
+
+    def resumen(self):
+        """
+        Totales por nombre de etapa (las etapas repetidas se suman y la
+        memoria es el máximo). Devuelve {etapa: {tiempo, memoria, veces,
+        llamadas}}.
+        """
+        total = {}
+        for r in self.etapas:
+            t = total.setdefault(r['etapa'], dict(tiempo=0.0, memoria=0, veces=0,
+                                                  llamadas=Counter()))
+            t['tiempo'] += r['tiempo']
+            t['memoria'] = max(t['memoria'], r.get('memoria', 0))
+            t['veces'] += 1
+            t['llamadas'].update(r['llamadas'])
+        for t in total.values():
+            t['llamadas'] = dict(t['llamadas'])
+        return total
+
+    def escribir(self, archivo, etapas=None):
+        """Agrega las etapas (todas por defecto) a `archivo`, una línea JSON por etapa."""
+        with open(archivo, 'a') as f:
+            for r in self.etapas if etapas is None else etapas:
+                f.write(json.dumps(dict(etiqueta=self.etiqueta, **r)) + '\n')
+
+    def __str__(self):
+        lineas = ["%-14s %10s %12s  %s" % ("etapa", "tiempo [s]", "memoria [MB]", "llamadas")]
+        for nombre, t in self.resumen().items():
+            llamadas = ", ".join("%s=%d" % kv for kv in t['llamadas'].items())
+            lineas.append("%-14s %10.5f %12.2f  %s"
+                          % (nombre, t['tiempo'], t['memoria'] / 2**20, llamadas))
+        return "\n".join(lineas)
+
+
+def etapa(metricas, nombre):
+    """metricas.etapa(nombre), o un contexto vacío si metricas es None."""
+    if metricas is None:
+        return contextlib.nullcontext()
+    return metricas.etapa(nombre)
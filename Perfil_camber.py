@@ -1,53 +1,106 @@
+import os
+import functools
+
 import numpy as np
-import matplotlib.pyplot as plt
-
-# Parámetros del perfil
-# número de paneles 
-# para visualizar la grafica del cp vs x (n = 500) 
-n = 10       
-c = 1.0           # cuerda
-e = 0.1*c        
-rho = 1.225        # densidad del aire [kg/m³]
-V = 1.0            # velocidad libre
-alpha = np.radians(0)
-U_inf = V * np.cos(alpha)
-W_inf = V * np.sin(alpha)
-Q_inf = 0.5 * rho * V**2
-
-# Línea de la cuerda y línea de curvatura
-x = np.linspace(0.001, c, n)
-eta = 4 * e * (x / c) * (1 - x / c)  
-xc = (np.linspace(0.001, c, n-1))/c 
-
-# Puntos de vortice y colocacion 
-vx = np.zeros(n-1)
-vy = np.zeros(n-1)
-cx = np.zeros(n-1)
-cy = np.zeros(n-1)
-nx = np.zeros(n-1)
-ny = np.zeros(n-1)
-tx = np.zeros(n-1)
-ty = np.zeros(n-1)
-
-for k in range(n - 1):
-    dy = eta[k + 1] - eta[k]
-    dx = x[k + 1] - x[k]
+from scipy.linalg import lu_factor, lu_solve
+
+from Graficos import pyplot, terminar
+from PrecisionMixta import factorizar32, refinar
+from Resultados import ArchivoResultados
+
+
+# Geometría de los paneles sobre una línea de curvatura cualquiera
+def geometria_linea_media(x, eta):
+    """
+    Paneles entre los puntos (x, eta) de la línea media, con el vórtice a
+    1/4 y el punto de colocación a 3/4 de cada panel. Opera sobre el
+    último eje, así que eta puede ser (perfiles, n) para muchos perfiles.
+    Devuelve los arreglos (..., n-1) vx, vy, cx, cy, nx, ny, tx, ty.
+    """
+    dy = np.diff(eta, axis=-1)
+    dx = np.diff(x, axis=-1)
     ds = np.sqrt(dy**2 + dx**2)
     alfai = np.arctan(-dy / dx)
+    cos_a, sin_a = np.cos(alfai), np.sin(alfai)
+    x0, eta0 = x[..., :-1], eta[..., :-1]
 
-    # Vórtice (1/4 ds)
-    vx[k] = x[k] + (ds / 4) * np.cos(alfai)
-    vy[k] = eta[k] - (ds / 4) * np.sin(alfai)
-
-    # Punto de colocación (3/4 ds)
-    cx[k] = x[k] + (3 * ds / 4) * np.cos(alfai)
-    cy[k] = eta[k] - (3 * ds / 4) * np.sin(alfai)
+    # Vórtice (1/4 ds) y punto de colocación (3/4 ds)
+    vx = x0 + (ds / 4) * cos_a
+    vy = eta0 - (ds / 4) * sin_a
+    cx = x0 + (3 * ds / 4) * cos_a
+    cy = eta0 - (3 * ds / 4) * sin_a
 
     # Vectores unitarios
-    nx[k] = np.sin(alfai)
-    ny[k] = np.cos(alfai)
-    tx[k] = np.cos(alfai)
-    ty[k] = -np.sin(alfai)
+    nx, ny = sin_a, cos_a
+    tx, ty = cos_a, -sin_a
+    return vx, vy, cx, cy, nx, ny, tx, ty
+
+
+# Geometría de los paneles sobre la línea de curvatura
+def geometria_perfil(n, c, e):
+    """
+    Línea de curvatura parabólica de flecha e y n puntos, con el vórtice a
+    1/4 y el punto de colocación a 3/4 de cada panel. Devuelve x, eta y los
+    arreglos (n-1,) vx, vy, cx, cy, nx, ny, tx, ty.
+    """
+    # Línea de la cuerda y línea de curvatura
+    x = np.linspace(0.001, c, n)
+    eta = 4 * e * (x / c) * (1 - x / c)
+    return (x, eta) + geometria_linea_media(x, eta)
+
+
+# Línea media NACA de 4 dígitos
+def naca4(codigo):
+    """Flecha máxima m y su posición p (fracciones de la cuerda) de un perfil 'mpxx'."""
+    codigo = str(codigo).zfill(4)
+    return int(codigo[0]) / 100, int(codigo[1]) / 10
+
+
+def camber_naca(x, c, m, p):
+    """
+    Línea media NACA de 4 dígitos y su pendiente en los puntos x. Devuelve
+    eta y deta/dx (ceros para los perfiles simétricos, p = 0).
+    """
+    xc = np.asarray(x) / c
+    if m == 0 or p == 0:
+        return np.zeros_like(xc), np.zeros_like(xc)
+    delante = xc < p
+    k = np.where(delante, m / p**2, m / (1 - p)**2)
+    eta = c * np.where(delante, k * (2 * p * xc - xc**2),
+                       k * ((1 - 2 * p) + 2 * p * xc - xc**2))
+    pendiente = 2 * k * (p - xc)
+    return eta, pendiente
+
+
+def geometria_seccion(n, c, e, naca=None):
+    """geometria_perfil (parábola de flecha e) o, si se da naca, la línea media NACA."""
+    if naca is None:
+        return geometria_perfil(n, c, e)
+    x = np.linspace(0.001, c, n)
+    eta = camber_naca(x, c, *naca4(naca))[0]
+    return (x, eta) + geometria_linea_media(x, eta)
+
+
+# Teoría del perfil delgado para una línea media cualquiera
+def teoria_perfil_delgado(pendiente, x, c, alpha, n_terminos=40, n_theta=400):
+    """
+    Coeficientes de Fourier A0..An de la teoría del perfil delgado a partir
+    de la pendiente deta/dx(x) (una función), con cuadratura de Gauss en
+    theta. Devuelve ΔCp en los puntos x y CL = π(2 A0 + A1).
+    """
+    t, w = np.polynomial.legendre.leggauss(n_theta)
+    theta = 0.5 * np.pi * (t + 1)
+    w = 0.5 * np.pi * w
+    d = pendiente(0.5 * c * (1 - np.cos(theta)))
+
+    k = np.arange(1, n_terminos + 1)
+    A0 = alpha - np.sum(w * d) / np.pi
+    An = 2 / np.pi * (w * d) @ np.cos(np.outer(theta, k))
+
+    th = np.arccos(1 - 2 * np.asarray(x) / c)
+    DCP = 4 * (A0 * np.sqrt((c - x) / x) + np.sin(np.outer(th, k)) @ An)
+    return DCP, np.pi * (2 * A0 + An[0])
+
 
 # Funcion de influencia vortice 2D
 def vor2d(x, z, x1, z1, gamma=1.0):
@@ -61,79 +114,388 @@ def vor2d(x, z, x1, z1, gamma=1.0):
     w = v * (-rx / r)
     return u, w
 
-# Matriz de influencia A y vector RHS
-A = np.zeros((n - 1,  n - 1))
-RHS = np.zeros(n - 1)
 
-for i in range(n - 1):
-    for j in range(n - 1):
-        u, w = vor2d(cx[i], cy[i], vx[j], vy[j], 1.0)
-        A[i, j] = u * nx[i] + w * ny[i]
-    RHS[i] = -U_inf * nx[i] - W_inf * ny[i]
+# Matriz de influencia A (dtype=np.float32 para guardarla en precisión simple)
+def matriz_influencia(cx, cy, vx, vy, nx, ny, dtype=np.float64):
+    """
+    A[i, j] = velocidad normal en el punto de colocación i del vórtice j
+    con gamma = 1, la misma de vor2d (incluido el corte r < 1e-5) pero
+    calculada de una vez. Con arreglos (perfiles, m) devuelve (perfiles, m, m).
+    """
+    rx = cx[..., :, None] - vx[..., None, :]
+    rz = cy[..., :, None] - vy[..., None, :]
+    r2 = rx**2 + rz**2
+    r2[r2 < 1e-10] = np.inf
+    u = 0.5 / np.pi * rz / r2
+    w = 0.5 / np.pi * -rx / r2
+    return (u * nx[..., :, None] + w * ny[..., :, None]).astype(dtype, copy=False)
+
+
+# Producto A @ gamma en float64 sin guardar A, por bloques de filas
+def producto_influencia(cx, cy, vx, vy, nx, ny, gamma, bloque=1024):
+    m = len(cx)
+    Ag = np.zeros(m)
+    for i0 in range(0, m, bloque):
+        i1 = min(i0 + bloque, m)
+        rx = cx[i0:i1, None] - vx[None, :]
+        rz = cy[i0:i1, None] - vy[None, :]
+        r2 = rx**2 + rz**2
+        # Mismo corte que vor2d (r < 1e-5)
+        r2[r2 < 1e-10] = np.inf
+        u = 0.5 / np.pi * rz / r2
+        w = 0.5 / np.pi * -rx / r2
+        Ag[i0:i1] = (u * nx[i0:i1, None] + w * ny[i0:i1, None]) @ gamma
+    return Ag
+
+
+def resolver_perfil(n=10, c=1.0, e=None, alpha=0.0, V=1.0, rho=1.225,
+                    precision='doble', tol=1e-12, naca=None):
+    """
+    Método de paneles de vórtices sobre la línea de curvatura. e es la
+    flecha máxima (0.1 c por defecto) y alpha el ángulo de ataque en rad.
+    Con naca='2412' se usa la línea media NACA de 4 dígitos en lugar de la
+    parábola, y ΔCp y CL analíticos salen de la teoría del perfil delgado.
+    Con precision='mixta' A se guarda y factoriza en float32 y gamma se
+    refina en float64 hasta ||RHS - A gamma|| / ||RHS|| < tol (A queda
+    sobrescrita por su factorización y se devuelve None); residuos es la
+    historia del refinamiento y convergio indica si se alcanzó tol (ambos
+    None con precision='doble').
+    Devuelve un diccionario con la geometría, A, gamma, ΔCp numérico y
+    analítico y CL numérico y analítico.
+    """
+    if precision not in ('doble', 'mixta'):
+        raise ValueError("Precisión desconocida: %s" % precision)
+    if e is None:
+        e = 0.1*c
+    U_inf = V * np.cos(alpha)
+    W_inf = V * np.sin(alpha)
+    Q_inf = 0.5 * rho * V**2
+
+    x, eta, vx, vy, cx, cy, nx, ny, tx, ty = geometria_seccion(n, c, e, naca)
+    xc = (np.linspace(0.001, c, n-1))/c
+
+    # Matriz de influencia A y vector RHS
+    RHS = -U_inf * nx - W_inf * ny
+
+    # Solucion del sistema
+    if precision == 'mixta':
+        lu32 = factorizar32(matriz_influencia(cx, cy, vx, vy, nx, ny, np.float32))
+        gamma, residuos, convergio = refinar(
+            lambda g: producto_influencia(cx, cy, vx, vy, nx, ny, g), lu32, RHS, tol)
+        A = None
+    else:
+        A = matriz_influencia(cx, cy, vx, vy, nx, ny)
+        gamma = np.linalg.solve(A, RHS)
+        residuos = convergio = None
+
+    #---- Calculo de los coefientes --------
+    dx = c / (n-1)
+    DL = rho * V * gamma
+    DCP = DL / dx / Q_inf
+
+    # Coeficiente de sustentación
+    BL = np.sum(DL)
+    CL = BL / (Q_inf * c)
+
+    # Solución analítica del delta Cp
+    if naca is None:
+        xi = x[:-1]
+        DD = 32.0 * e / c * np.sqrt(xi / c * (1 - xi / c))
+        DCP_analit = 4.0 * np.sqrt((c - xi) / xi) * alpha + DD
+        CL_analit = 2.0 * np.pi * (alpha + 2 * e / c)
+    else:
+        m, p = naca4(naca)
+        DCP_analit, CL_analit = teoria_perfil_delgado(
+            lambda xx: camber_naca(xx, c, m, p)[1], x[:-1], c, alpha)
+
+    return dict(x=x, eta=eta, xc=xc, vx=vx, vy=vy, cx=cx, cy=cy, nx=nx, ny=ny,
+                tx=tx, ty=ty, A=A, gamma=gamma, DCP=DCP, DCP_analit=DCP_analit,
+                CL=CL, CL_analit=CL_analit, residuos=residuos, convergio=convergio)
+
+
+# ============================================================
+# POLAR: MUCHOS ÁNGULOS CON UNA SOLA FACTORIZACIÓN
+# ============================================================
+@functools.lru_cache(maxsize=32)
+def factorizar_perfil(n=10, c=1.0, e=None, naca=None):
+    """
+    Geometría de la sección y factorización LU de su matriz A, que no
+    depende de alpha. Queda en memoria para las siguientes llamadas con la
+    misma sección (n, c, e, naca). Devuelve (geometría, lu).
+    """
+    if e is None:
+        e = 0.1*c
+    geo = geometria_seccion(n, c, e, naca)
+    vx, vy, cx, cy, nx, ny = geo[2:8]
+    return geo, lu_factor(matriz_influencia(cx, cy, vx, vy, nx, ny))
+
+
+def polar_perfil(alphas, n=10, c=1.0, e=None, V=1.0, rho=1.225, naca=None, lu=None):
+    """
+    Resuelve todos los ángulos de ataque alphas [rad] con una sola
+    factorización de A (la de factorizar_perfil, o `lu` si se da) y un
+    único lu_solve con un RHS por ángulo. Devuelve un diccionario con CL,
+    el coeficiente de momento respecto al borde de ataque Cm_ba y a 1/4 de
+    la cuerda Cm_c4 (positivos a cabrear), ΔCp (ángulos, n-1), gamma y lu.
+    """
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    if lu is None:
+        geo, lu = factorizar_perfil(n, c, e, naca)
+    else:
+        # Con la factorización dada sólo hace falta la geometría
+        geo = geometria_seccion(n, c, 0.1*c if e is None else e, naca)
+    x, _, vx, _, _, _, nx, ny = geo[:8]
+    Q_inf = 0.5 * rho * V**2
 
-# Solucion del sistema 
-gamma = np.linalg.solve(A, RHS)
+    RHS = -V * (np.outer(nx, np.cos(alphas)) + np.outer(ny, np.sin(alphas)))
+    gamma = lu_solve(lu, RHS).T
 
-#---- Calculo de los coefientes --------
-dx = c / (n-1)
-DL = rho * V * gamma
-DCP = DL / dx / Q_inf
+    DL = rho * V * gamma
+    DCP = DL / (c / (n-1)) / Q_inf
+    CL = DL.sum(axis=1) / (Q_inf * c)
 
-# Solución analítica del delta Cp
-DCP_analit = np.zeros(n-1)
-for i in range(n-1):
-    DD = 32.0 * e / c * np.sqrt(x[i] / c * (1 - x[i] / c))
-    DCP_analit[i] = 4.0 * np.sqrt((c - x[i]) / x[i]) * alpha + DD
+    # Momento de la sustentación aplicada en cada vórtice
+    Cm_ba = -(DL @ vx) / (Q_inf * c**2)
+    Cm_c4 = Cm_ba + CL / 4
+    return dict(alphas=alphas, CL=CL, Cm_ba=Cm_ba, Cm_c4=Cm_c4, DCP=DCP,
+                gamma=gamma, xc=x[:-1] / c, lu=lu)
+
+
+# ============================================================
+# SENSIBILIDADES ADJUNTAS RESPECTO A LA LÍNEA MEDIA Y ALPHA
+# ============================================================
+def sensibilidades_perfil(x, eta, alpha=0.0, c=1.0, V=1.0, rho=1.225, pesos_dcp=None,
+                          lu=None):
+    """
+    Gradientes de CL, Cm_ba (momento respecto al borde de ataque) y, si se
+    dan pesos_dcp (n-1,), de J = pesos_dcp · ΔCp, respecto a las n
+    ordenadas eta de la línea media y a alpha. Para cada salida J = gᵀ gamma
+    el adjunto lam resuelve Aᵀ lam = g (todas juntas en un solo lu_solve
+    transpuesto con la factorización de A, o con `lu` si se da), y
+    dJ/dp = lamᵀ (dRHS/dp - dA/dp gamma). dA/dp gamma se arma con las
+    derivadas analíticas del núcleo de vor2d, así que el costo no depende
+    del número de variables de diseño. Para un parámetro p de la línea media
+    (flecha, NACA, ...) basta dJ/dp = dJ_deta @ deta/dp.
+    Devuelve un diccionario con CL, Cm_ba, gamma, dCL_deta, dCL_dalpha,
+    dCm_deta, dCm_dalpha y, con pesos_dcp, J, dJ_deta y dJ_dalpha.
+    """
+    x = np.asarray(x, dtype=float)
+    eta = np.asarray(eta, dtype=float)
+    n = len(x)
+    vx, vy, cx, cy, nx, ny, _, _ = geometria_linea_media(x, eta)
+    if lu is None:
+        lu = lu_factor(matriz_influencia(cx, cy, vx, vy, nx, ny))
+    U_inf, W_inf = V * np.cos(alpha), V * np.sin(alpha)
+    Q_inf = 0.5 * rho * V**2
+    gamma = lu_solve(lu, -U_inf * nx - W_inf * ny)
+
+    # Salidas lineales en gamma: CL, Cm_ba y pesos · ΔCp (columnas de G)
+    G = [np.full(n - 1, rho * V / (Q_inf * c)), -rho * V * vx / (Q_inf * c**2)]
+    if pesos_dcp is not None:
+        G.append(rho * V / (c / (n - 1)) / Q_inf * np.asarray(pesos_dcp, dtype=float))
+    G = np.column_stack(G)
+    lam = lu_solve(lu, G, trans=1)
+    J = G.T @ gamma
+
+    # Derivadas de A[i, j] = (rz nx_i - rx ny_i) / (2π r²) (con el corte de vor2d)
+    rx = cx[:, None] - vx[None, :]
+    rz = cy[:, None] - vy[None, :]
+    r2 = rx**2 + rz**2
+    r2[r2 < 1e-10] = np.inf
+    num = rz * nx[:, None] - rx * ny[:, None]
+    dA_drz = (nx[:, None] * r2 - 2 * rz * num) / (2 * np.pi * r2**2)
+    dA_dnx = rz / (2 * np.pi * r2)
+    dA_dny = -rx / (2 * np.pi * r2)
+
+    # Sólo vy, cy, nx y ny dependen de eta (vx y cx no)
+    dy = np.diff(eta)
+    dx = np.diff(x)
+    ds3 = (dx**2 + dy**2)**1.5
+    dnx_ddy = -dx**2 / ds3
+    dny_ddy = -dx * dy / ds3
+
+    # lamᵀ (dRHS/dp - dA/dp gamma) por panel, para cada salida (columnas)
+    g_cy = -lam * (dA_drz @ gamma)[:, None]
+    g_vy = gamma[:, None] * (dA_drz.T @ lam)
+    g_nx = lam * (-U_inf - (dA_dnx @ gamma)[:, None])
+    g_ny = lam * (-W_inf - (dA_dny @ gamma)[:, None])
+    g_dy = g_nx * dnx_ddy[:, None] + g_ny * dny_ddy[:, None]
+
+    # Cada panel i depende de eta[i] (a) y eta[i+1] (b): vy = 0.75a + 0.25b,
+    # cy = 0.25a + 0.75b, dy = b - a
+    dJ_deta = np.zeros((n, G.shape[1]))
+    dJ_deta[:-1] += 0.75 * g_vy + 0.25 * g_cy - g_dy
+    dJ_deta[1:] += 0.25 * g_vy + 0.75 * g_cy + g_dy
+    dJ_dalpha = lam.T @ (V * np.sin(alpha) * nx - V * np.cos(alpha) * ny)
+
+    res = dict(CL=J[0], Cm_ba=J[1], gamma=gamma, dCL_deta=dJ_deta[:, 0],
+               dCL_dalpha=dJ_dalpha[0], dCm_deta=dJ_deta[:, 1], dCm_dalpha=dJ_dalpha[1])
+    if pesos_dcp is not None:
+        res.update(J=J[2], dJ_deta=dJ_deta[:, 2], dJ_dalpha=dJ_dalpha[2])
+    return res
+
+
+def verificar_sensibilidades(x, eta, alpha=0.0, c=1.0, V=1.0, rho=1.225, pesos_dcp=None,
+                             h=1e-6):
+    """
+    Compara los gradientes adjuntos de sensibilidades_perfil con
+    diferencias centradas de paso h en cada eta y en alpha. Devuelve el
+    mayor error relativo (respecto al mayor gradiente de cada salida).
+    """
+    eta = np.asarray(eta, dtype=float)
+    res = sensibilidades_perfil(x, eta, alpha, c, V, rho, pesos_dcp)
+    salidas = [('CL', 'dCL_deta', 'dCL_dalpha'), ('Cm_ba', 'dCm_deta', 'dCm_dalpha')]
+    if pesos_dcp is not None:
+        salidas.append(('J', 'dJ_deta', 'dJ_dalpha'))
+
+    def valores(eta, alpha):
+        r = sensibilidades_perfil(x, eta, alpha, c, V, rho, pesos_dcp)
+        return np.array([r[s[0]] for s in salidas])
+
+    fd = np.zeros((len(eta) + 1, len(salidas)))
+    for k in range(len(eta)):
+        d = np.zeros(len(eta))
+        d[k] = h
+        fd[k] = (valores(eta + d, alpha) - valores(eta - d, alpha)) / (2 * h)
+    fd[-1] = (valores(eta, alpha + h) - valores(eta, alpha - h)) / (2 * h)
+
+    adj = np.array([np.r_[res[s[1]], res[s[2]]] for s in salidas]).T
+    return np.max(np.abs(adj - fd).max(axis=0) / np.abs(adj).max(axis=0))
+
+
+# ============================================================
+# MUCHOS PERFILES EN UNA LLAMADA
+# ============================================================
+def etas_naca(codigos, n, c=1.0):
+    """Líneas medias NACA de 4 dígitos, forma (perfiles, n), en x = linspace(0.001, c, n)."""
+    x = np.linspace(0.001, c, n)
+    return np.array([camber_naca(x, c, *naca4(cod))[0] for cod in codigos])
+
+
+def resolver_perfiles(etas, c=1.0, alpha=0.0, V=1.0, rho=1.225, memoria_max=2**28):
+    """
+    Resuelve muchos perfiles a la vez: etas (perfiles, n) son las
+    ordenadas de la línea media en x = linspace(0.001, c, n) y alpha un
+    escalar o un ángulo por perfil. Las matrices se arman y resuelven por
+    lotes de perfiles para no pasar de unos `memoria_max` bytes.
+    Devuelve un diccionario con x, gamma y DCP (perfiles, n-1) y CL (perfiles,).
+    """
+    etas = np.atleast_2d(np.asarray(etas, dtype=float))
+    n_perfiles, n = etas.shape
+    alpha = np.broadcast_to(np.asarray(alpha, dtype=float), (n_perfiles,))
+    x = np.linspace(0.001, c, n)
+    Q_inf = 0.5 * rho * V**2
+
+    # Unos 8 arreglos (n-1, n-1) por perfil mientras se arma A
+    lote = max(1, int(memoria_max // (8 * 8 * (n - 1)**2)))
+    gamma = np.zeros((n_perfiles, n - 1))
+    for k0 in range(0, n_perfiles, lote):
+        k1 = min(k0 + lote, n_perfiles)
+        vx, vy, cx, cy, nx, ny, _, _ = geometria_linea_media(x, etas[k0:k1])
+        a = alpha[k0:k1, None]
+        RHS = -V * np.cos(a) * nx - V * np.sin(a) * ny
+        A = matriz_influencia(cx, cy, vx, vy, nx, ny)
+        gamma[k0:k1] = np.linalg.solve(A, RHS[..., None])[..., 0]
+
+    DL = rho * V * gamma
+    DCP = DL / (c / (n - 1)) / Q_inf
+    CL = DL.sum(axis=1) / (Q_inf * c)
+    return dict(x=x, gamma=gamma, DCP=DCP, CL=CL)
+
+
+# Columnas de un caso en el archivo binario de resultados
+COLUMNAS = ('vx', 'vy', 'cx', 'cy', 'nx', 'ny', 'tx', 'ty', 'gamma', 'DCP')
+
+
+def guardar_perfil(res, archivo='paneles_vortices.npz', con_A=False, **meta):
+    """
+    Agrega un caso de resolver_perfil a un ArchivoResultados (geometría,
+    gamma y ΔCp; A sólo con con_A=True). CL, CL_analit y los metadatos
+    dados se guardan con el caso. Devuelve el número del caso.
+    """
+    columnas = {k: res[k] for k in COLUMNAS}
+    if con_A:
+        columnas['A'] = res['A']
+    return ArchivoResultados(archivo).agregar(columnas, n=len(res['x']), CL=res['CL'],
+                                              CL_analit=res['CL_analit'], **meta)
 
-# Coeficiente de sustentación
-BL = np.sum(DL)
-CL = BL / (Q_inf * c)
-CL_analit = 2.0 * np.pi * (alpha + 2 * e / c)
 
 # Figura 1: distribucion de los vortices y puntos de estancamiento
-plt.figure(figsize=(7, 5))
-plt.plot(x, eta, '-', color='k')
-plt.plot(vx, vy, 'm.', label='Vórtices (1/4 ds)')
-plt.plot(cx, cy, 'o', label='Puntos de colocación (3/4 ds)')
-plt.quiver(cx, cy, nx, ny, color='r', scale=18, label='Vectores normales')
-plt.quiver(cx, cy, tx, ty, color='g', scale=18, label='Vectores tangentes')
-plt.axis('equal')
-plt.grid()
-plt.legend()
-plt.xlabel('$x/c$')
-plt.ylabel('$η/c$')
-plt.title('Método de Paneles de Vórtices')
-plt.show()
+def graficar_paneles(res, archivo=None):
+    plt = pyplot(archivo is not None)
+    fig = plt.figure(figsize=(7, 5))
+    plt.plot(res['x'], res['eta'], '-', color='k')
+    plt.plot(res['vx'], res['vy'], 'm.', label='Vórtices (1/4 ds)')
+    plt.plot(res['cx'], res['cy'], 'o', label='Puntos de colocación (3/4 ds)')
+    plt.quiver(res['cx'], res['cy'], res['nx'], res['ny'], color='r', scale=18,
+               label='Vectores normales')
+    plt.quiver(res['cx'], res['cy'], res['tx'], res['ty'], color='g', scale=18,
+               label='Vectores tangentes')
+    plt.axis('equal')
+    plt.grid()
+    plt.legend()
+    plt.xlabel('$x/c$')
+    plt.ylabel('$η/c$')
+    plt.title('Método de Paneles de Vórtices')
+    terminar(fig, archivo)
+
 
 # Figura 2: distribucion del delta_cp vs x/c
-plt.figure(figsize=(8, 5))
-plt.plot(xc, DCP, 'orange', label='Numérico')
-plt.plot(xc, DCP_analit, 'r-', label='Analítico')
-plt.grid()
-plt.xlabel('$x/c$')
-plt.ylabel('$ΔC_p$')
-plt.title('Distribución de ΔCp vs x/c a lo largo de la cuerda')
-plt.legend()
-plt.show()
-
-# Resultados 
-print("\n ------ Resultado metodo de vortices -------- ")
-print(f"Ángulo de ataque: 0°")
-print(f"CL (numérico)   = {CL:.4f}")
-print(f"CL (analítico)  = {CL_analit:.4f}\n")
-
-print("i    x/c     ΔCp(num)    ΔCp(analit)")
-for i in range(n-1):
-    print(f"{i+1:2d}   {xc[i]:6.3f}     {DCP[i]:9.4f}     {DCP_analit[i]:9.4f}")
-
-print("\n--- Matriz de influencia A ---")
-print(A)
-print("\n--- Vector solución (Γ) ---")
-print(gamma)
-
-# ---- Guardar datos ----
-data = np.column_stack((vx, vy, cx, cy, nx, ny, tx, ty, gamma, DCP))
-header = 'vx,vy,cx,cy,nx,ny,tx,ty,gamma,DeltaCp'
-np.savetxt('paneles_vortices.txt', data, delimiter=',', header=header, comments='')
-print("\nDatos guardados en 'paneles_vortices.txt'")
+def graficar_dcp(res, archivo=None):
+    plt = pyplot(archivo is not None)
+    fig = plt.figure(figsize=(8, 5))
+    plt.plot(res['xc'], res['DCP'], 'orange', label='Numérico')
+    plt.plot(res['xc'], res['DCP_analit'], 'r-', label='Analítico')
+    plt.grid()
+    plt.xlabel('$x/c$')
+    plt.ylabel('$ΔC_p$')
+    plt.title('Distribución de ΔCp vs x/c a lo largo de la cuerda')
+    plt.legend()
+    terminar(fig, archivo)
+
+
+if __name__ == "__main__":
+    # Parámetros del perfil
+    # número de paneles
+    # para visualizar la grafica del cp vs x (n = 500)
+    n = 10
+    c = 1.0           # cuerda
+    e = 0.1*c
+    rho = 1.225        # densidad del aire [kg/m³]
+    V = 1.0            # velocidad libre
+    alpha = np.radians(0)
+
+    res = resolver_perfil(n, c, e, alpha, V, rho)
+    xc, DCP, DCP_analit = res['xc'], res['DCP'], res['DCP_analit']
+
+    graficar_paneles(res)
+    graficar_dcp(res)
+
+    # Resultados
+    print("\n ------ Resultado metodo de vortices -------- ")
+    print(f"Ángulo de ataque: {np.degrees(alpha):g}°")
+    print(f"CL (numérico)   = {res['CL']:.4f}")
+    print(f"CL (analítico)  = {res['CL_analit']:.4f}\n")
+
+    print("i    x/c     ΔCp(num)    ΔCp(analit)")
+    for i in range(n-1):
+        print(f"{i+1:2d}   {xc[i]:6.3f}     {DCP[i]:9.4f}     {DCP_analit[i]:9.4f}")
+
+    # Verificación de los gradientes adjuntos con diferencias finitas
+    x_s, eta_s = geometria_perfil(n, c, e)[:2]
+    error_adj = verificar_sensibilidades(x_s, eta_s, np.radians(2), c, V, rho,
+                                         pesos_dcp=np.ones(n-1))
+    print(f"\nSensibilidades adjuntas vs. diferencias finitas: error relativo {error_adj:.2e}")
+
+    print("\nMatriz de influencia A:", res['A'].shape,
+          "- número de condición: %.3e" % np.linalg.cond(res['A']))
 
+    # ---- Guardar datos (binario; el texto sólo como exportación) ----
+    # El ejemplo empieza un archivo nuevo en cada corrida en lugar de agregarle casos
+    if os.path.exists('paneles_vortices.npz'):
+        os.remove('paneles_vortices.npz')
+    caso = guardar_perfil(res, 'paneles_vortices.npz', con_A=True,
+                          alpha=float(alpha), e=e, c=c)
+    print(f"\nCaso {caso} guardado en 'paneles_vortices.npz'")
+    # Para exportar a texto:
+    # ArchivoResultados('paneles_vortices.npz').exportar_texto(caso, 'paneles_vortices.txt')
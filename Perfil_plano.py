@@ -1,58 +1,141 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from scipy.linalg import solve_toeplitz, matmul_toeplitz
+from scipy.sparse.linalg import LinearOperator, cg
 
-# Parámetros 
-c = 1
-qinf = 18.24
-rho = 1.225  # kg/m3
-alfa = np.radians(5)
+from Graficos import pyplot, terminar
 
-N = 5
-dc = c / N
 
-# Definición de puntos 
-x_panel = np.linspace(0, c, N+1)
-x = x_panel[:-1] + 0.25*dc      # puntos de vórtice (1/4 ds)
-xf = x_panel[:-1] + 0.75*dc     # puntos de colocación (3/4 ds)
-y = np.zeros(N)
+# ============================================================
+# SISTEMA DE TOEPLITZ DE LA PLACA PLANA
+# ============================================================
+def generador_placa(N):
+    """
+    Con paneles uniformes x[pos] - xf[i] = dc (pos - i - 1/2), así que
+    q[i, pos] = 1 / (2 (pos - i) - 1) sólo depende de pos - i (Toeplitz).
+    Devuelve la primera columna y la primera fila de q.
+    """
+    k = np.arange(N)
+    columna = 1 / (-2.0 * k - 1)
+    fila = 1 / (2.0 * k - 1)
+    return columna, fila
 
-print("x vortex (1/4 ds):", np.round(x, 3))
-print("x collocation (3/4 ds):", np.round(xf, 3))
 
-# Matriz Q 
-gamma = np.ones(N)
-q = np.zeros((N, N))  
+def resolver_toeplitz(columna, fila, b, metodo='fft', tol=1e-13, max_iter=200):
+    """
+    Resuelve q s = b sin formar q. 'levinson' es la recursión de Levinson,
+    O(N²). 'fft' usa gradiente conjugado sobre las ecuaciones normales
+    (qᵀ q s = qᵀ b) con productos de Toeplitz por FFT, O(N log N) por
+    iteración: los autovalores de q están en un círculo alrededor del
+    origen, donde GMRES se estanca, pero q está bien condicionada y CG
+    converge en una docena de iteraciones para cualquier N.
+    Devuelve s y la historia de residuos relativos ||b - q s|| / ||b||;
+    si CG no converge en max_iter iteraciones lanza RuntimeError.
+    """
+    if metodo == 'levinson':
+        s = solve_toeplitz((columna, fila), b)
+        r = np.linalg.norm(b - matmul_toeplitz((columna, fila), s)) / np.linalg.norm(b)
+        return s, np.array([r])
 
-for i in range(N):
-    for pos in range(N):
-        diferencia = x[pos] - xf[i]
-        q[i, pos] = (1 / diferencia) * (dc / 2)
+    n = len(b)
+    qT_q = LinearOperator((n, n), matvec=lambda v: matmul_toeplitz(
+        (fila, columna), matmul_toeplitz((columna, fila), v)))
+    norma_b = np.linalg.norm(b)
+    residuos = []
 
-print("\nMatriz Q:")
-print(np.round(q, 4))
+    def registrar(s):
+        residuos.append(np.linalg.norm(b - matmul_toeplitz((columna, fila), s)) / norma_b)
 
-# Resolver sistema 
-sln = np.linalg.solve(q, gamma)
-sln = (-1) * sln / (qinf * np.sin(alfa) * dc * np.pi)
+    s, info = cg(qT_q, matmul_toeplitz((fila, columna), b), rtol=tol, maxiter=max_iter,
+                 callback=registrar)
+    if info != 0:
+        raise RuntimeError("CG no convergió en %d iteraciones (residuo %.3e)"
+                           % (max_iter, residuos[-1] if residuos else np.nan))
+    return s, np.array(residuos)
 
-deltaL = rho * qinf * (-sln)
-L = np.sum(deltaL)
 
-cl = (2 * np.sum(sln)) / qinf
-print('\ncl =', cl)
-print('\nSolución del sistema:')
-print(sln)
+def resolver_placa_plana(N=5, c=1, qinf=18.24, rho=1.225, alfa=np.radians(5),
+                         metodo='auto'):
+    """
+    Placa plana con N paneles de vórtices (vórtice a 1/4 y colocación a 3/4
+    de cada panel). metodo: 'denso' arma q y la resuelve con
+    np.linalg.solve; 'levinson' y 'fft' sólo usan la primera columna y fila
+    de q (ver resolver_toeplitz); 'auto' usa 'denso' hasta N = 1000 y 'fft'
+    por encima. Devuelve un diccionario con los bordes de los paneles, los
+    puntos de vórtice y de colocación, la matriz q (None si no se arma), su
+    columna y fila, la solución (circulación de cada vórtice) y cl.
+    """
+    dc = c / N
+
+    # Definición de puntos
+    x_panel = np.linspace(0, c, N+1)
+    x = x_panel[:-1] + 0.25*dc      # puntos de vórtice (1/4 ds)
+    xf = x_panel[:-1] + 0.75*dc     # puntos de colocación (3/4 ds)
+
+    # Matriz Q (Toeplitz)
+    gamma = np.ones(N)
+    columna, fila = generador_placa(N)
+    if metodo == 'auto':
+        metodo = 'denso' if N <= 1000 else 'fft'
+
+    # Resolver sistema
+    if metodo == 'denso':
+        q = (dc / 2) / (x[None, :] - xf[:, None])
+        sln = np.linalg.solve(q, gamma)
+        residuos = None
+    else:
+        q = None
+        sln, residuos = resolver_toeplitz(columna, fila, gamma, metodo)
+
+    # q s = 1 equivale a Γ / (2π) = -V sin(α) s dc / 2
+    sln = (-1) * sln * (qinf * np.sin(alfa) * dc * np.pi)
+
+    deltaL = rho * qinf * sln
+    L = np.sum(deltaL)
+
+    cl = (2 * np.sum(sln)) / (qinf * c)
+    return dict(x_panel=x_panel, x=x, xf=xf, q=q, columna=columna, fila=fila, sln=sln,
+                residuos=residuos, deltaL=deltaL, L=L, cl=cl)
+
 
 # -------- Gráfica --------
-plt.figure(figsize=(8,4))
-plt.plot(x_panel, np.zeros_like(x_panel), 'k-', linewidth=1.5)
-plt.plot(x, y, 'bo', label='Vortices (1/4)')
-plt.plot(xf, y, 'ro', label='Puntos de Colocacion (3/4)')
-
-plt.grid()
-plt.axis('equal')
-plt.legend()
-plt.xlabel('$x/c$')
-plt.ylabel('$y/c$')
-plt.title('método de paneles de vórtices')
-plt.show()
+def graficar_placa(res, archivo=None):
+    plt = pyplot(archivo is not None)
+    x_panel, x, xf = res['x_panel'], res['x'], res['xf']
+    y = np.zeros(len(x))
+
+    fig = plt.figure(figsize=(8,4))
+    plt.plot(x_panel, np.zeros_like(x_panel), 'k-', linewidth=1.5)
+    plt.plot(x, y, 'bo', label='Vortices (1/4)')
+    plt.plot(xf, y, 'ro', label='Puntos de Colocacion (3/4)')
+
+    plt.grid()
+    plt.axis('equal')
+    plt.legend()
+    plt.xlabel('$x/c$')
+    plt.ylabel('$y/c$')
+    plt.title('método de paneles de vórtices')
+    terminar(fig, archivo)
+
+
+if __name__ == "__main__":
+    # Parámetros
+    c = 1
+    qinf = 18.24
+    rho = 1.225  # kg/m3
+    alfa = np.radians(5)
+
+    N = 5
+
+    res = resolver_placa_plana(N, c, qinf, rho, alfa)
+
+    print("x vortex (1/4 ds):", np.round(res['x'], 3))
+    print("x collocation (3/4 ds):", np.round(res['xf'], 3))
+
+    print("\nMatriz Q:")
+    print(np.round(res['q'], 4))
+
+    print('\ncl =', res['cl'])
+    print('\nSolución del sistema:')
+    print(res['sln'])
+
+    graficar_placa(res)
@@ -0,0 +1,141 @@
+import numpy as np
+from math import pi
+
+
+# ============================================================
+# GEOMETRÍA DE LAS FRANJAS
+# ============================================================
+def franjas(xgr, ygr, zgr):
+    """
+    Posición y del centro, ancho y cuerda de cada franja de la semiala
+    (una por columna de paneles). Devuelve tres arreglos (Ny-1,).
+    """
+    P = np.stack([xgr, ygr, zgr], axis=-1)
+    c = np.linalg.norm(P[-1] - P[0], axis=-1)
+    y_franja = 0.5 * (ygr[0, 1:] + ygr[0, :-1])
+    dy_franja = ygr[0, 1:] - ygr[0, :-1]
+    cuerda_franja = 0.5 * (c[1:] + c[:-1])
+    return y_franja, dy_franja, cuerda_franja
+
+
+# ============================================================
+# CARGAS EN LA ENVERGADURA (CAMPO CERCANO)
+# ============================================================
+def cargas_envergadura(Gammas, ws, y_franja, dy_franja, cuerda_franja, Vinf=10,
+                       rho=1.225, AWing=None, HS=None, W_vector=None):
+    """
+    Cargas de un ala simétrica a partir de las circulaciones y el downwash
+    de cada panel (ordenados como herraduras()). Gammas y ws pueden tener
+    dimensiones extra al inicio (varios casos a la vez): (..., paneles).
+    La resistencia inducida se da positiva (ws < 0 es downwash). Si se dan
+    HS y W_vector, Cdi_y, CDi y e se calculan en el plano de Trefftz en
+    lugar de con ws.
+    Devuelve un diccionario con Cl_y, Cdi_y y L_franja (..., franjas) y
+    CL, CDi, la eficiencia de envergadura e y el momento flector en la
+    raíz M_raiz (...,).
+    """
+    Gammas = np.asarray(Gammas, dtype=float)
+    ws = np.asarray(ws, dtype=float)
+    n_franjas = len(y_franja)
+    forma = Gammas.shape[:-1] + (-1, n_franjas)
+
+    # Circulación y downwash por franja (suma de las filas en la cuerda)
+    G_franja = Gammas.reshape(forma).sum(axis=-2)
+    wG_franja = (ws * Gammas).reshape(forma).sum(axis=-2)
+
+    L_franja = rho * Vinf * G_franja * dy_franja
+    if HS is None:
+        D_franja = -rho * wG_franja * dy_franja
+    else:
+        # Contribución de la semiala (la función la da para el ala completa)
+        D_franja = 0.5 * resistencia_trefftz(Gammas, HS, W_vector, Vinf, rho,
+                                             n_franjas=n_franjas)[2]
+
+    if AWing is None:
+        AWing = 2 * np.sum(cuerda_franja * dy_franja)
+    b = 2 * np.sum(dy_franja)
+    q = 0.5 * rho * Vinf**2
+
+    Cl_y = L_franja / (q * cuerda_franja * dy_franja)
+    Cdi_y = D_franja / (q * cuerda_franja * dy_franja)
+    CL = 2 * L_franja.sum(axis=-1) / (q * AWing)
+    CDi = 2 * D_franja.sum(axis=-1) / (q * AWing)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        e = CL**2 / (pi * (b**2 / AWing) * CDi)
+    M_raiz = np.sum(L_franja * y_franja, axis=-1)
+
+    return dict(Cl_y=Cl_y, Cdi_y=Cdi_y, L_franja=L_franja, CL=CL, CDi=CDi, e=e,
+                M_raiz=M_raiz)
+
+
+# ============================================================
+# RESISTENCIA INDUCIDA EN EL PLANO DE TREFFTZ (CAMPO LEJANO)
+# ============================================================
+def matriz_trefftz(HS, W_vector, simetria=True):
+    """
+    Influencia de las piernas de estela, vistas como vórtices puntuales 2D
+    en el plano normal a la estela, sobre la velocidad normal en el punto
+    medio de cada herradura. Solo depende de la geometría, así que se
+    reutiliza para cualquier número de casos.
+    Devuelve K (paneles, paneles) con w_n = K @ Gammas y el largo de cada
+    herradura proyectada.
+    """
+    HS = np.asarray(HS, dtype=float)
+    w = np.asarray(W_vector, dtype=float)
+    w = w / np.linalg.norm(w)
+    e1 = np.array([0.0, 1.0, 0.0])
+    e1 = e1 - w * np.dot(e1, w)
+    e1 /= np.linalg.norm(e1)
+    e2 = np.cross(w, e1)
+
+    # Extremos del vórtice ligado proyectados en el plano de Trefftz
+    A = np.stack([HS[:, 1] @ e1, HS[:, 1] @ e2], axis=-1)
+    B = np.stack([HS[:, 2] @ e1, HS[:, 2] @ e2], axis=-1)
+    medio = 0.5 * (A + B)
+    t = B - A
+    largo = np.linalg.norm(t, axis=-1)
+    normal = np.stack([-t[:, 1], t[:, 0]], axis=-1) / largo[:, None]
+
+    # Pierna en B: +Gamma aguas abajo; pierna en A: -Gamma
+    puntos = [(B, 1.0), (A, -1.0)]
+    if simetria:
+        puntos += [(B * [-1, 1], -1.0), (A * [-1, 1], 1.0)]
+
+    K = np.zeros((len(HS), len(HS)))
+    for P, signo in puntos:
+        r = medio[:, None, :] - P[None, :, :]
+        r2 = np.sum(r**2, axis=-1)
+        r2[r2 == 0] = np.inf
+        # Vórtice a lo largo de +w: v = Gamma / (2 pi r^2) (-r2, r1)
+        K += signo * (normal[:, None, 0] * -r[..., 1] +
+                      normal[:, None, 1] * r[..., 0]) / (2 * pi * r2)
+    return K, largo
+
+
+def resistencia_trefftz(Gammas, HS, W_vector, Vinf=10, rho=1.225, AWing=None,
+                        simetria=True, n_franjas=None, K=None):
+    """
+    Resistencia inducida en el plano de Trefftz, Di = -rho/2 sum(Gamma w_n ds),
+    usando solo la geometría de las piernas de estela. Gammas puede traer
+    varios casos: (..., paneles). Con simetria=True se suma la semiala
+    imagen. Si se da n_franjas, las filas en la cuerda se suman en una sola
+    línea de vórtices (la del borde de fuga), lo que evita que el desfase
+    entre filas de la estela afecte el resultado. Devuelve Di del ala
+    completa, CDi (si se da AWing) y la contribución por herradura (o por
+    franja). K es la salida de matriz_trefftz si ya se calculó.
+    """
+    Gammas = np.asarray(Gammas, dtype=float)
+    if n_franjas is not None:
+        Gammas = Gammas.reshape(Gammas.shape[:-1] + (-1, n_franjas)).sum(axis=-2)
+        HS = np.asarray(HS)[-n_franjas:]
+    if K is None:
+        K = matriz_trefftz(HS, W_vector, simetria)
+    K, largo = K
+    w_n = Gammas @ K.T
+
+    Di_panel = -0.5 * rho * Gammas * w_n * largo
+    if simetria:
+        Di_panel = 2 * Di_panel
+    Di = Di_panel.sum(axis=-1)
+    CDi = None if AWing is None else Di / (0.5 * rho * Vinf**2 * AWing)
+    return Di, CDi, Di_panel
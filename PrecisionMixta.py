@@ -0,0 +1,41 @@
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+
+# ============================================================
+# FACTORIZACIÓN EN FLOAT32 CON REFINAMIENTO EN FLOAT64
+# ============================================================
+def factorizar32(A32):
+    """
+    Factorización LU en float32 (sgetrf). Se sobrescribe A32 para no tener
+    dos copias de la matriz en memoria.
+    """
+    return lu_factor(np.asarray(A32, dtype=np.float32), overwrite_a=True,
+                     check_finite=False)
+
+
+def refinar(aplicar, lu32, b, tol=1e-10, max_iter=10):
+    """
+    Refinamiento iterativo: cada corrección se resuelve con la
+    factorización en float32 y el residuo b - A x se calcula en float64 con
+    aplicar(x). Se detiene cuando ||b - A x|| / ||b|| < tol.
+    Devuelve x (float64), la historia de residuos relativos y si convergió.
+    """
+    b = np.asarray(b, dtype=np.float64)
+    norma_b = np.linalg.norm(b) or 1.0
+
+    x = lu_solve(lu32, b.astype(np.float32), check_finite=False).astype(np.float64)
+    residuos = []
+    for k in range(max_iter):
+        r = b - aplicar(x)
+        residuos.append(np.linalg.norm(r) / norma_b)
+        if residuos[-1] < tol:
+            return x, np.array(residuos), True
+        # El residuo se escala para que no se pierda en float32
+        escala = np.max(np.abs(r)) or 1.0
+        d = lu_solve(lu32, (r / escala).astype(np.float32), check_finite=False)
+        x += escala * d.astype(np.float64)
+
+    r = b - aplicar(x)
+    residuos.append(np.linalg.norm(r) / norma_b)
+    return x, np.array(residuos), residuos[-1] < tol
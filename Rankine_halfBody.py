@@ -1,62 +1,84 @@
-import numpy as np 
+import numpy as np
 from math import pi
-import matplotlib.pyplot as plt
 
-n = 200
-X = np.linspace(-4,4,n) 
-Y = np.linspace(-4,4,n)  
-x,y =np.meshgrid(X,Y)
+from FlujoPotencial import Flujo, Uniforme, Fuente, lineas_corriente, polilineas
+from Graficos import pyplot, terminar, dibujar_lineas
 
-m = 5.0
-Uinf = 5.0 
-xs = -1.0 
-ys = 0.0
 
-# primero vamos a encontrar la velocidad local 
-u = Uinf + m/(2*pi) * ((x - xs) /((x-xs)**2 + (y-ys)**2))
-v = m/(2*pi) * ((y - ys) /((x-xs)**2+ (y-ys)**2))
+def semicuerpo_rankine(x, y, m, Uinf, xs=-1.0, ys=0.0):
+    """
+    Flujo uniforme más una fuente de intensidad m en (xs, ys). Devuelve u,
+    v, la velocidad local, cp y la función de corriente.
+    """
+    f = Flujo([Uniforme(Uinf), Fuente(m, xs, ys)]).campo(x, y, ('u', 'v', 'Cp', 'psi'))
+    u, v = f['u'], f['v']
 
-# velocidad local
-vloc = np.sqrt((u**2 + v**2))
+    # velocidad local
+    vloc = np.sqrt((u**2 + v**2))
+    return u, v, vloc, f['Cp'], f['psi']
 
-# coeficiente de presion 
-cp =  1.0 - ((u**2 + v**2)/Uinf**2) 
- 
-# punto de estancamiento 
-xss = (xs-m/(2*pi*Uinf))
-print('xss=',xss)
 
-#barido hasta 30 grados 
-theta =  np.linspace(pi,30*pi/180,25)
+# punto de estancamiento
+def estancamiento_semicuerpo(m, Uinf, xs=-1.0):
+    return (xs-m/(2*pi*Uinf))
 
-# posiciones de la fuente 
-yf = (m/2 - m/(2*pi)*theta)/Uinf;
-xf = (xs - yf/np.tan(theta));
-
-
-#streamlines
-pssi = Uinf*y +m/(2*pi)*np.arctan2((y-ys),(x-xs));
 
 # ----------- Grafica ------------
-firg1 = plt.figure(0)
-ax = plt.axes()
-
-contcp = plt.contourf(x,y,cp,levels=np.linspace(-2.0,1.0,100),extend = 'both')
-#contcp = plt.contourf(x,y,vloc,levels=np.linspace(-2.0,1.0,100),extend = 'both')
-cbar = plt.colorbar(contcp)
-ax.scatter(xs, ys, c= 'red', marker='o', s=7**2)
-ax.scatter(xss, ys, c= 'b', marker='o', s=7**2)
-ax.quiver(x,y, u,v, color = 'white')
-plt.streamplot(x,y,u,v,density = 2, linewidth =1, arrowsize =1,arrowstyle = '->')
-ax.contour(x,y,pssi,levels = [-m/2,m/2],colors ='g')
-
-# relacion de aspecto de la cajita 
-ax.set_aspect('equal' ,'box')
-
-ax.set_xlim(-2, 2)
-ax.set_ylim(-2, 2)
-
-plt.grid()
-plt.show()
-
-
+def graficar_semicuerpo(x, y, u, v, cp, pssi, m, Uinf, xs=-1.0, ys=0.0, archivo=None):
+    plt = pyplot(archivo is not None)
+    xss = estancamiento_semicuerpo(m, Uinf, xs)
+
+    firg1 = plt.figure()
+    ax = plt.axes()
+
+    contcp = plt.contourf(x,y,cp,levels=np.linspace(-2.0,1.0,100),extend = 'both')
+    #contcp = plt.contourf(x,y,vloc,levels=np.linspace(-2.0,1.0,100),extend = 'both')
+    cbar = plt.colorbar(contcp)
+    ax.scatter(xs, ys, c= 'red', marker='o', s=7**2)
+    ax.scatter(xss, ys, c= 'b', marker='o', s=7**2)
+    ax.quiver(x,y, u,v, color = 'white')
+    # lineas de corriente sobre la velocidad exacta: desde la entrada y desde la fuente
+    y0 = np.linspace(-2, 2, 30)
+    th = np.linspace(0, 2*pi, 16, endpoint=False)
+    flujo = Flujo([Uniforme(Uinf), Fuente(m, xs, ys)])
+    lineas = lineas_corriente(flujo, np.r_[-2*np.ones_like(y0), xs + 0.05*np.cos(th)],
+                              np.r_[y0, ys + 0.05*np.sin(th)], longitud=10, paso=0.02,
+                              limites=(-2, 2, -2, 2))
+    dibujar_lineas(ax, polilineas(lineas))
+    ax.contour(x,y,pssi,levels = [-m/2,m/2],colors ='g')
+
+    # relacion de aspecto de la cajita
+    ax.set_aspect('equal' ,'box')
+
+    ax.set_xlim(-2, 2)
+    ax.set_ylim(-2, 2)
+
+    plt.grid()
+    terminar(firg1, archivo)
+
+
+if __name__ == "__main__":
+    n = 200
+    X = np.linspace(-4,4,n)
+    Y = np.linspace(-4,4,n)
+    x,y =np.meshgrid(X,Y)
+
+    m = 5.0
+    Uinf = 5.0
+    xs = -1.0
+    ys = 0.0
+
+    u, v, vloc, cp, pssi = semicuerpo_rankine(x, y, m, Uinf, xs, ys)
+
+    # punto de estancamiento
+    xss = estancamiento_semicuerpo(m, Uinf, xs)
+    print('xss=',xss)
+
+    #barido hasta 30 grados
+    theta =  np.linspace(pi,30*pi/180,25)
+
+    # posiciones de la fuente
+    yf = (m/2 - m/(2*pi)*theta)/Uinf;
+    xf = (xs - yf/np.tan(theta));
+
+    graficar_semicuerpo(x, y, u, v, cp, pssi, m, Uinf, xs, ys)
@@ -0,0 +1,111 @@
+import os
+import json
+import struct
+import zipfile
+
+import numpy as np
+
+
+# ============================================================
+# ARCHIVO BINARIO DE RESULTADOS (UN .npz QUE SE VA AGRANDANDO)
+# ============================================================
+class ArchivoResultados:
+    """
+    Resultados de muchos casos en un solo archivo .npz. Cada caso se
+    agrega al final (sin reescribir los anteriores) como un grupo de
+    arreglos 'caso00000/<columna>' más sus metadatos en JSON. Las columnas
+    se leen sólo cuando se piden; como se guardan sin comprimir, las
+    grandes (p. ej. la matriz A) se pueden abrir como memoria mapeada.
+    El archivo se sigue pudiendo abrir con np.load.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+
+    def _nombres(self):
+        if not os.path.exists(self.archivo):
+            return []
+        with zipfile.ZipFile(self.archivo) as z:
+            return z.namelist()
+
+    def __len__(self):
+        return sum(nombre.endswith('/_meta.npy') for nombre in self._nombres())
+
+    def agregar(self, columnas, **meta):
+        """
+        Agrega un caso con las columnas dadas (diccionario de arreglos; las
+        que son None se omiten) y los metadatos (valores que se puedan
+        pasar a JSON). Devuelve el número del caso.
+        """
+        caso = len(self)
+        prefijo = 'caso%05d/' % caso
+        meta = {k: (v.item() if isinstance(v, np.generic) else v) for k, v in meta.items()}
+        with zipfile.ZipFile(self.archivo, 'a', zipfile.ZIP_STORED, allowZip64=True) as z:
+            for nombre, valor in columnas.items():
+                if valor is None:
+                    continue
+                with z.open(prefijo + nombre + '.npy', 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asanyarray(valor), allow_pickle=False)
+            with z.open(prefijo + '_meta.npy', 'w') as f:
+                np.lib.format.write_array(f, np.array(json.dumps(meta)), allow_pickle=False)
+        return caso
+
+    def casos(self):
+        """Metadatos de todos los casos, en orden."""
+        with np.load(self.archivo) as datos:
+            return [json.loads(str(datos['caso%05d/_meta' % k])) for k in range(len(self))]
+
+    def columnas(self, caso=0):
+        """Nombres de las columnas guardadas para un caso."""
+        prefijo = 'caso%05d/' % caso
+        return [n[len(prefijo):-4] for n in self._nombres()
+                if n.startswith(prefijo) and not n.endswith('/_meta.npy')]
+
+    def leer(self, caso, columna, mmap=False):
+        """
+        Una columna de un caso. Con mmap=True se devuelve un np.memmap de
+        sólo lectura sobre el archivo, sin cargarla en memoria.
+        """
+        nombre = 'caso%05d/%s.npy' % (caso, columna)
+        if not mmap:
+            with zipfile.ZipFile(self.archivo) as z, z.open(nombre) as f:
+                return np.lib.format.read_array(f, allow_pickle=False)
+
+        with zipfile.ZipFile(self.archivo) as z:
+            info = z.getinfo(nombre)
+        with open(self.archivo, 'rb') as f:
+            # Cabecera local del zip: 30 bytes fijos más el nombre y el campo extra
+            f.seek(info.header_offset + 26)
+            largo_nombre, largo_extra = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + largo_nombre + largo_extra)
+            version = np.lib.format.read_magic(f)
+            leer_cabecera = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                             else np.lib.format.read_array_header_2_0)
+            forma, fortran, dtype = leer_cabecera(f)
+            inicio = f.tell()
+        return np.memmap(self.archivo, dtype=dtype, mode='r', offset=inicio, shape=forma,
+                         order='F' if fortran else 'C')
+
+    def columna(self, nombre, casos=None):
+        """
+        La misma columna de varios casos (todos por defecto), apilada si
+        todas tienen la misma forma y como lista si no.
+        """
+        casos = range(len(self)) if casos is None else casos
+        valores = [self.leer(k, nombre) for k in casos]
+        if len({v.shape for v in valores}) == 1:
+            return np.stack(valores)
+        return valores
+
+    def exportar_texto(self, caso, archivo, columnas=None, delimitador=','):
+        """
+        Exporta a texto las columnas 1D de un caso (todas las que tengan el
+        largo de la primera, por defecto), una por columna del archivo.
+        """
+        columnas = columnas or [c for c in self.columnas(caso)
+                                if self.leer(caso, c, mmap=True).ndim == 1]
+        datos = [self.leer(caso, c) for c in columnas]
+        columnas = [c for c, d in zip(columnas, datos) if d.shape == datos[0].shape]
+        datos = [d for d in datos if d.shape == datos[0].shape]
+        np.savetxt(archivo, np.column_stack(datos), delimiter=delimitador,
+                   header=delimitador.join(columnas), comments='')
@@ -1,10 +1,13 @@
 # %matplotlib
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import cm
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib as mpl
 from math import pi
+from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse.linalg import LinearOperator, gmres
+from VortexTree import ArbolVortices
+from PostProceso import franjas, cargas_envergadura
+from PrecisionMixta import factorizar32, refinar
+from Metricas import Metricas, contar, etapa
+from Graficos import pyplot, terminar
 
 # ============================================================
 # FUNCIÓN PARA IGUALAR ESCALAS EN EJE 3D
@@ -43,6 +46,7 @@ def HSvel(HS, Cpx, Cpy, Cpz, gsingn, k):
     tol = 0.00005
     u = v = w = 0
     udw = vdw = wdw = 0
+    contar('HSvel')
 
     for i in range(3):
         # Coordenadas relativas
@@ -62,6 +66,11 @@ def HSvel(HS, Cpx, Cpy, Cpz, gsingn, k):
         r1n = np.sqrt(r1x**2 + r1y**2 + r1z**2)
         r2n = np.sqrt(r2x**2 + r2y**2 + r2z**2)
 
+        # Punto a menos de tol del segmento (o su prolongación): sin contribución
+        r0n2 = r0x**2 + r0y**2 + r0z**2
+        if r1n < tol or r2n < tol or norm2 < tol**2 * r0n2:
+            continue
+
         # Producto punto
         r0Dr1 = r0x * r1x + r0y * r1y + r0z * r1z
         r0Dr2 = r0x * r2x + r0y * r2y + r0z * r2z
@@ -86,204 +95,853 @@ def HSvel(HS, Cpx, Cpy, Cpz, gsingn, k):
 
 
 # ============================================================
-# PARÁMETROS DEL FLUJO
+# FUNCIÓN DE VELOCIDAD INDUCIDA (VERSIÓN VECTORIZADA)
 # ============================================================
-Vinf = 10                  # Velocidad del flujo libre
-Alpha = 5 * (pi / 180)     # Ángulo de ataque [rad]
-rho = 1.225                # Densidad del aire [kg/m³]
+def HSvel_lote(HS, Cpx, Cpy, Cpz, gsingn=1.0, tol=0.00005):
+    """
+    Calcula en una sola pasada vectorizada la velocidad inducida por M
+    vórtices de herradura sobre N puntos.
 
-# Vector de velocidad libre
-Vinf_vector = np.array([Vinf * np.cos(Alpha), 0, Vinf * np.sin(Alpha)])
+    HS tiene forma (M, 4, 3) (los mismos 4 vértices que usa HSvel) y
+    Cpx, Cpy, Cpz forma (N,). Devuelve u, v, w, udw, vdw, wdw con forma
+    (N, M). Aplica el mismo corte de núcleo `tol` que HSvel.
+    """
+    HS = np.asarray(HS, dtype=float)
+    Cp = np.stack([np.asarray(Cpx, dtype=float),
+                   np.asarray(Cpy, dtype=float),
+                   np.asarray(Cpz, dtype=float)], axis=-1)[:, None, :]
+    contar('HSvel_lote')
+    contar('pares_HSvel', Cp.shape[0] * HS.shape[0])
 
+    vel = np.zeros((3,) + (Cp.shape[0], HS.shape[0]))
+    vel_dw = np.zeros_like(vel)
 
-# ============================================================
-# PARÁMETROS GEOMÉTRICOS DEL ALA
-# ============================================================
-SwA = 45 * (pi / 180)      # Ángulo de flecha
-Tpr = 1                    # Relación de estrechamiento
-b2 = 5                     # Semienvergadura
-b = 2 * b2                 # Envergadura total
+    for i in range(3):
+        # Coordenadas relativas (N, M, 3)
+        r1 = Cp - HS[None, :, i, :]
+        r2 = Cp - HS[None, :, i + 1, :]
 
-DihA = 0 * (pi / 180)      # Ángulo diedro
-twist = 0 * (pi / 180)     # Ángulo de torsión
+        # Vector del segmento (1, M, 3)
+        r0 = (HS[:, i + 1, :] - HS[:, i, :])[None, :, :]
 
-Croot = 0.2 * b            # Cuerda en la raíz
-Ctip = Tpr * Croot         # Cuerda en la punta
+        # Producto cruzado entre r1 y r2
+        r1Xr2 = np.cross(r1, r2)
+        norm2 = np.einsum('nmk,nmk->nm', r1Xr2, r1Xr2)
 
-# Cuerda media geométrica y área
-CMG = (2 / 3) * Croot * ((1 + Tpr + Tpr**2) / (1 + Tpr))
-AWing = 2 * (0.5 * (Croot + Ctip) * b2)
+        # Distancias
+        r1n = np.sqrt(np.einsum('nmk,nmk->nm', r1, r1))
+        r2n = np.sqrt(np.einsum('nmk,nmk->nm', r2, r2))
 
-# Discretización de la superficie
-Ny = 5   
-Nx = 4   
+        # Corte de núcleo: los pares a menos de tol del segmento no contribuyen
+        r0n2 = np.einsum('mk,mk->m', r0[0], r0[0])[None, :]
+        nucleo = (r1n < tol) | (r2n < tol) | (norm2 < tol**2 * r0n2)
+        norm2 = np.where(nucleo, 1.0, norm2)
+        r1n = np.where(nucleo, 1.0, r1n)
+        r2n = np.where(nucleo, 1.0, r2n)
 
-yb = b2 * np.linspace(0, 1, Ny)
-Cx = np.array([0, 1/4, 3/4, 1]) * Croot
+        # Producto punto
+        r0Dr1 = np.einsum('nmk,nmk->nm', np.broadcast_to(r0, r1.shape), r1)
+        r0Dr2 = np.einsum('nmk,nmk->nm', np.broadcast_to(r0, r2.shape), r2)
 
-# Inicialización de mallas
-xgr = np.zeros((Nx, Ny))
-ygr = np.zeros((Nx, Ny))
-zgr = np.zeros((Nx, Ny))
+        # Velocidades inducidas
+        k = gsingn / (4.0 * pi * norm2) * ((r0Dr1 / r1n) - (r0Dr2 / r2n))
+        k[nucleo] = 0.0
 
+        vi = np.moveaxis(k[:, :, None] * r1Xr2, -1, 0)
+        vel += vi
 
-# ============================================================
-# CONSTRUCCIÓN DE LA GEOMETRÍA
-# ============================================================
-tpr_j = np.linspace(1, Tpr, Ny)
-twist_j = np.linspace(0, twist, Ny)
-Czr = np.zeros(Nx)
+        # Se suman los segmentos longitudinales al downwash
+        if i in [0, 2]:
+            vel_dw += vi
+
+    return vel[0], vel[1], vel[2], vel_dw[0], vel_dw[1], vel_dw[2]
+
+
+def coeficientes_influencia(HS, xcp, ycp, zcp, unvx, unvy, unvz, simetria=True):
+    """
+    Construye las matrices de influencia a_coeffs y b_coeffs para todos
+    los puntos de colocación y todas las herraduras (más su imagen
+    reflejada respecto al plano y = 0 si simetria=True) de una sola vez.
+    """
+    u_hs, v_hs, w_hs, ud_hs, vd_hs, wd_hs = HSvel_lote(HS, xcp, ycp, zcp, 1.0)
+
+    if simetria:
+        # Imagen reflejada
+        HS_img = np.array(HS, dtype=float)
+        HS_img[:, :, 1] *= -1
+        u_hsL, v_hsL, w_hsL, ud_hsL, vd_hsL, wd_hsL = HSvel_lote(HS_img, xcp, ycp,
+                                                                 zcp, -1.0)
+
+        # Superposición
+        u_hs += u_hsL
+        v_hs += v_hsL
+        w_hs += w_hsL
+        ud_hs += ud_hsL
+        vd_hs += vd_hsL
+        wd_hs += wd_hsL
 
-for j in range(Ny):
-    ybi = yb[j]
-    tpr_loc = tpr_j[j]
-    twist_loc = twist_j[j]
-    for i in range(Nx):
-        xj = tpr_loc * Cx[i]
-        zj = tpr_loc * Czr[i]
+    unvx = np.asarray(unvx)[:, None]
+    unvy = np.asarray(unvy)[:, None]
+    unvz = np.asarray(unvz)[:, None]
+    a_coeffs = unvx * u_hs + unvy * v_hs + unvz * w_hs
+    b_coeffs = unvx * ud_hs + unvy * vd_hs + unvz * wd_hs
+    return a_coeffs, b_coeffs
 
-        
-        x_rt = xj * np.cos(twist_loc) + zj * np.sin(twist_loc)
-        z_rt = xj * np.sin(twist_loc) + zj * np.cos(twist_loc)
 
-        # Desplazamientos por flecha y diedro
-        x_p = x_rt + ybi * np.tan(SwA)
-        z_p = z_rt + ybi * np.tan(DihA)
+def ensamblar_influencias(HS, xcp, ycp, zcp, unvx, unvy, unvz, bloque=None,
+                          memoria_max=2**28, simetria=True, dtype=np.float64,
+                          con_b=True):
+    """
+    Ensambla a_coeffs y b_coeffs por bloques de filas (puntos de
+    colocación), de modo que los temporales de HSvel_lote nunca superen
+    aproximadamente `memoria_max` bytes, sin importar el tamaño de la malla.
+    Cada bloque se calcula en float64 y se guarda en `dtype`; con
+    con_b=False no se guarda b_coeffs (se devuelve None).
+    """
+    n_cp = len(xcp)
+    n_hs = len(HS)
+    if bloque is None:
+        # HSvel_lote mantiene del orden de 20 arreglos (bloque, M) en float64
+        bloque = max(1, int(memoria_max // (20 * 8 * max(n_hs, 1))))
+
+    a_coeffs = np.zeros((n_cp, n_hs), dtype=dtype)
+    b_coeffs = np.zeros((n_cp, n_hs), dtype=dtype) if con_b else None
 
-        xgr[i, j], ygr[i, j], zgr[i, j] = x_p, ybi, z_p
+    for j0 in range(0, n_cp, bloque):
+        j1 = min(j0 + bloque, n_cp)
+        a_blk, b_blk = coeficientes_influencia(
+            HS, xcp[j0:j1], ycp[j0:j1], zcp[j0:j1],
+            unvx[j0:j1], unvy[j0:j1], unvz[j0:j1], simetria)
+        a_coeffs[j0:j1] = a_blk
+        if con_b:
+            b_coeffs[j0:j1] = b_blk
+
+    return a_coeffs, b_coeffs
 
 
 # ============================================================
-# DEFINICIÓN DEL VÓRTICE
+# FUNCIONES DE LA MALLA DE VÓRTICES
 # ============================================================
-W_farP = 20 * b
-W_vector = np.array([W_farP * np.cos(Alpha), 0, W_farP * np.sin(Alpha)])
+def lineas_vortices(xgr, ygr, zgr, W_vector):
+    """
+    Ubica el vórtice ligado de cada fila de paneles a 1/4 de su cuerda y
+    construye la estela (punto lejano y punto ligado) de cada herradura.
+    Devuelve xw, yw, zw con forma (2, Nx-1, Ny).
+    """
+    xv = xgr[:-1] + 0.25 * (xgr[1:] - xgr[:-1])
+    yv = ygr[:-1] + 0.25 * (ygr[1:] - ygr[:-1])
+    zv = zgr[:-1] + 0.25 * (zgr[1:] - zgr[:-1])
+
+    xw = np.stack([xv + W_vector[0], xv])
+    yw = np.stack([yv + W_vector[1], yv])
+    zw = np.stack([zv + W_vector[2], zv])
+    return xw, yw, zw
+
+
+def herraduras(xw, yw, zw):
+    """
+    Arma los vértices de todas las herraduras, una por panel, ordenadas
+    por filas en la cuerda (índice de panel = i * (Ny-1) + j).
+    Devuelve un arreglo de forma ((Nx-1)*(Ny-1), 4, 3).
+    """
+    P = np.stack([xw, yw, zw], axis=-1)        # (2, Nx-1, Ny, 3)
+    HS = np.stack([P[0, :, :-1], P[1, :, :-1], P[1, :, 1:], P[0, :, 1:]], axis=2)
+    return HS.reshape(-1, 4, 3)
+
+
+def reflejar_herraduras(HS):
+    """
+    Herraduras de la semiala izquierda a partir de las de la derecha:
+    refleja y -> -y e invierte el orden de los vértices, de modo que con
+    la misma Gamma ambas semialas tienen el mismo sentido de giro.
+    """
+    HS_izq = np.array(HS[:, ::-1], dtype=float)
+    HS_izq[:, :, 1] *= -1
+    return HS_izq
+
+
+def puntos_colocacion(xgr, ygr, zgr):
+    """
+    Calcula los puntos de colocación (3/4 de la cuerda de cada panel, a
+    mitad de su envergadura) y los vectores normales unitarios, aplanados
+    en el mismo orden que herraduras().
+    """
+    P = np.stack([xgr, ygr, zgr], axis=-1)     # (Nx, Ny, 3)
+    P34 = P[:-1] + 0.75 * (P[1:] - P[:-1])
+
+    # Punto de colocación
+    cp = 0.5 * (P34[:, :-1] + P34[:, 1:])
+
+    # Vector normal a partir de las esquinas delanteras del panel
+    A = cp - P[:-1, :-1]
+    B = cp - P[:-1, 1:]
+    nv = np.cross(B, A)
+    nv /= np.linalg.norm(nv, axis=-1, keepdims=True)
 
-xw = np.zeros((2, Ny))
-yw = np.zeros((2, Ny))
-zw = np.zeros((2, Ny))
+    cp = cp.reshape(-1, 3)
+    nv = nv.reshape(-1, 3)
+    return cp[:, 0], cp[:, 1], cp[:, 2], nv[:, 0], nv[:, 1], nv[:, 2]
 
-for j in range(Ny):
-    xw[0, j] = xgr[1, j] + W_vector[0]
-    yw[0, j] = ygr[1, j] + W_vector[1]
-    zw[0, j] = zgr[1, j] + W_vector[2]
-    xw[1, j], yw[1, j], zw[1, j] = xgr[1, j], ygr[1, j], zgr[1, j]
+
+def segmentos_herraduras(HS, Gammas, simetria=True):
+    """
+    Convierte las herraduras resueltas en segmentos rectos (inicio, fin,
+    circulación, es_estela) para evaluar su campo fuera del ala. Con
+    simetria=True se agregan las imágenes reflejadas con -Gamma.
+    """
+    HS = np.asarray(HS, dtype=float)
+    P1 = HS[:, :3].reshape(-1, 3)
+    P2 = HS[:, 1:].reshape(-1, 3)
+    G = np.repeat(Gammas, 3)
+    estela = np.tile([True, False, True], len(HS))
+
+    if simetria:
+        P1_img, P2_img = P1.copy(), P2.copy()
+        P1_img[:, 1] *= -1
+        P2_img[:, 1] *= -1
+        P1 = np.concatenate([P1, P1_img])
+        P2 = np.concatenate([P2, P2_img])
+        G = np.concatenate([G, -G])
+        estela = np.concatenate([estela, estela])
+
+    return P1, P2, G, estela
 
 
 # ============================================================
-# CÁLCULO DE PUNTOS DE COLOCACIÓN Y NORMALES
+# POLAR DE ÁNGULO DE ATAQUE (UNA SOLA FACTORIZACIÓN)
 # ============================================================
-xcp = np.zeros(Ny - 1)
-ycp = np.zeros(Ny - 1)
-zcp = np.zeros(Ny - 1)
-unvx = np.zeros(Ny - 1)
-unvy = np.zeros(Ny - 1)
-unvz = np.zeros(Ny - 1)
-RHS = np.zeros(Ny - 1)
+def polar_alfa(a_coeffs, b_coeffs, unvx, unvy, unvz, Delta_y, AWing, Alphas,
+               Vinfs=10.0, rho=1.225, n_franjas=None, lu=None):
+    """
+    Resuelve la malla para muchos casos (Alpha, Vinf) a la vez. La matriz
+    a_coeffs se factoriza una sola vez (o se reutiliza `lu`) y todos los
+    RHS se resuelven en una llamada; la estela queda fija en la dirección
+    con la que se ensambló a_coeffs.
+
+    Alphas y Vinfs se combinan por broadcasting. n_franjas (Ny - 1) es
+    obligatorio: la carga de los paneles de cada franja se suma en la
+    cuerda. Devuelve CL, Di (por caso), la carga por franja L_franja
+    (casos, n_franjas), las Gammas (casos, paneles) y la factorización LU
+    para reutilizarla.
+    """
+    # Con espaciado uniforme Delta_y no permite distinguir franjas de paneles
+    if n_franjas is None:
+        raise ValueError("Hay que dar n_franjas (Ny - 1)")
+    Alphas, Vinfs = np.broadcast_arrays(np.atleast_1d(np.asarray(Alphas, dtype=float)),
+                                        np.atleast_1d(np.asarray(Vinfs, dtype=float)))
+    if lu is None:
+        lu = lu_factor(a_coeffs)
 
-for j in range(Ny - 1):
-    # Definición de panel
-    p1x, p1y, p1z = xgr[0, j], ygr[0, j], zgr[0, j]
-    p2x, p2y, p2z = xgr[0, j + 1], ygr[0, j + 1], zgr[0, j + 1]
-    p3x, p3y, p3z = xgr[2, j], ygr[2, j], zgr[2, j]
-    p4x, p4y, p4z = xgr[2, j + 1], ygr[2, j + 1], zgr[2, j + 1]
+    # Condición de impermeabilidad para todos los casos (paneles, casos)
+    Vx = Vinfs * np.cos(Alphas)
+    Vz = Vinfs * np.sin(Alphas)
+    RHS = -(np.outer(unvx, Vx) + np.outer(unvz, Vz))
 
-    # Punto de colocación (centro del cuarto de cuerda)
-    xcpi = (p3x + p4x) / 2
-    ycpi = (p3y + p4y) / 2
-    zcpi = (p3z + p4z) / 2
+    Gammas = lu_solve(lu, RHS)
+    ws = b_coeffs @ Gammas
 
-    # Vector normal
-    Ax, Ay, Az = xcpi - p1x, ycpi - p1y, zcpi - p1z
-    Bx, By, Bz = xcpi - p2x, ycpi - p2y, zcpi - p2z
+    Delta_L = rho * Vinfs[None, :] * Gammas * Delta_y[:, None]
+    Delta_D = rho * ws * Gammas * Delta_y[:, None]
 
-    nvx, nvy, nvz = By * Az - Bz * Ay, Bz * Ax - Bx * Az, Bx * Ay - By * Ax
-    mnv = np.sqrt(nvx**2 + nvy**2 + nvz**2)
+    L = Delta_L.sum(axis=0)
+    Di = Delta_D.sum(axis=0)
+    CL = 2 * L / (0.5 * rho * Vinfs**2 * AWing)
 
-    xcp[j], ycp[j], zcp[j] = xcpi, ycpi, zcpi
-    unvx[j], unvy[j], unvz[j] = nvx / mnv, nvy / mnv, nvz / mnv
+    L_franja = Delta_L.reshape(-1, n_franjas, len(Alphas)).sum(axis=0).T
 
-    # Condición de impermeabilidad
-    RHS[j] = -np.dot(Vinf_vector, np.array([nvx, nvy, nvz])) / mnv
+    return CL, Di, L_franja, Gammas.T, lu
 
 
 # ============================================================
-# CÁLCULO DE COEFICIENTES INFLUENCIALES (MATRICES A Y B)
+# SOLUCIÓN SIN MATRIZ (GMRES)
 # ============================================================
-HS_i = np.zeros((4, 3))
-a_coeffs = np.zeros((Ny - 1, Ny - 1))
-b_coeffs = np.zeros((Ny - 1, Ny - 1))
-
-for j in range(Ny - 1):
-    xcpi, ycpi, zcpi = xcp[j], ycp[j], zcp[j]
-    unvxi, unvyi, unvzi = unvx[j], unvy[j], unvz[j]
+def operador_influencia(HS, xcp, ycp, zcp, unvx, unvy, unvz, metodo='bloques',
+                        bloque=None, memoria_max=2**28, tol_arbol=1e-4):
+    """
+    Devuelve una función Gammas -> (a_coeffs @ Gammas, b_coeffs @ Gammas)
+    que aplica el operador de influencia sin guardar ninguna matriz.
+    Con metodo='bloques' se recalcula HSvel_lote por bloques de filas; con
+    metodo='arbol' se evalúan las herraduras con ArbolVortices (error
+    relativo tol_arbol); como los puntos de colocación están sobre la
+    malla, el árbol sólo compensa para mallas de varios miles de paneles.
+    """
+    n_cp = len(xcp)
+    if metodo == 'arbol':
+        P1, P2, G, estela = segmentos_herraduras(HS, np.ones(len(HS)))
+        arbol = ArbolVortices(P1, P2, G, estela, tol=tol_arbol)
+        P_cp = np.column_stack([xcp, ycp, zcp])
+
+        def aplicar(Gammas):
+            arbol.circulacion(segmentos_herraduras(HS, Gammas)[2])
+            u, v, w, udw, vdw, wdw = arbol.velocidad(P_cp)
+            return (unvx * u + unvy * v + unvz * w,
+                    unvx * udw + unvy * vdw + unvz * wdw)
+        return aplicar
+
+    if bloque is None:
+        bloque = max(1, int(memoria_max // (20 * 8 * max(len(HS), 1))))
+
+    def aplicar(Gammas):
+        aG = np.zeros(n_cp)
+        bG = np.zeros(n_cp)
+        for j0 in range(0, n_cp, bloque):
+            j1 = min(j0 + bloque, n_cp)
+            a_blk, b_blk = coeficientes_influencia(
+                HS, xcp[j0:j1], ycp[j0:j1], zcp[j0:j1],
+                unvx[j0:j1], unvy[j0:j1], unvz[j0:j1])
+            aG[j0:j1] = a_blk @ Gammas
+            bG[j0:j1] = b_blk @ Gammas
+        return aG, bG
+    return aplicar
+
+
+def precondicionador_bloques(HS, xcp, ycp, zcp, unvx, unvy, unvz, n_franjas,
+                             tam_bloque=128):
+    """
+    Precondicionador de Jacobi por bloques de campo cercano: agrupa los
+    paneles de franjas vecinas en la envergadura (todas sus filas en la
+    cuerda), y factoriza exactamente la influencia dentro de cada grupo.
+    """
+    n = len(xcp)
+    n_filas = n // n_franjas
+    franjas = max(1, tam_bloque // n_filas)
+    j = np.arange(n) % n_franjas
+
+    grupos = []
+    for j0 in range(0, n_franjas, franjas):
+        idx = np.flatnonzero((j >= j0) & (j < j0 + franjas))
+        a_blk, _ = coeficientes_influencia(HS[idx], xcp[idx], ycp[idx], zcp[idx],
+                                           unvx[idx], unvy[idx], unvz[idx])
+        grupos.append((idx, lu_factor(a_blk)))
+
+    def aplicar(r):
+        x = np.zeros_like(r)
+        for idx, lu in grupos:
+            x[idx] = lu_solve(lu, r[idx])
+        return x
+    return LinearOperator((n, n), matvec=aplicar)
+
+
+def resolver_gmres(HS, xcp, ycp, zcp, unvx, unvy, unvz, RHS, n_franjas,
+                   metodo='bloques', tol=1e-8, reinicio=50, max_iter=200,
+                   tam_bloque=128, tol_arbol=1e-4):
+    """
+    Resuelve a_coeffs @ Gammas = RHS con GMRES sin formar a_coeffs, usando
+    el precondicionador de campo cercano. El downwash ws = b_coeffs @ Gammas
+    se obtiene con el mismo operador. Devuelve Gammas, ws, la historia de
+    residuos (uno por iteración) y el código de salida de GMRES (0 si
+    convergió).
+    """
+    aplicar = operador_influencia(HS, xcp, ycp, zcp, unvx, unvy, unvz, metodo,
+                                  tol_arbol=tol_arbol)
+    n = len(xcp)
+    A = LinearOperator((n, n), matvec=lambda g: aplicar(g)[0])
+    M = precondicionador_bloques(HS, xcp, ycp, zcp, unvx, unvy, unvz, n_franjas,
+                                 tam_bloque)
+
+    residuos = []
+    Gammas, info = gmres(A, RHS, rtol=tol, restart=reinicio, maxiter=max_iter, M=M,
+                         callback=residuos.append, callback_type='pr_norm')
+    ws = aplicar(Gammas)[1]
+    return Gammas, ws, np.array(residuos), info
+
+
+def resolver_precision_mixta(HS, xcp, ycp, zcp, unvx, unvy, unvz, RHS, tol=1e-10,
+                             max_iter=10, bloque=None, memoria_max=2**28):
+    """
+    Ensambla sólo a_coeffs, en float32, y lo factoriza en float32 (un
+    cuarto de la memoria de a_coeffs y b_coeffs en float64). La solución se
+    refina en float64 calculando el residuo con el operador sin matrices,
+    hasta que ||RHS - a_coeffs @ Gammas|| / ||RHS|| < tol; cada iteración
+    cuesta lo mismo que un ensamble. ws sale de la última aplicación del
+    operador. Devuelve Gammas, ws, la historia de residuos y si convergió.
+    """
+    a32 = ensamblar_influencias(HS, xcp, ycp, zcp, unvx, unvy, unvz, bloque,
+                                memoria_max, dtype=np.float32, con_b=False)[0]
+    lu32 = factorizar32(a32)
+    del a32
 
-    for k in range(Ny - 1):
-        # Coordenadas del vórtice
-        HS_i[0, :] = [xw[0, k], yw[0, k], zw[0, k]]
-        HS_i[1, :] = [xw[1, k], yw[1, k], zw[1, k]]
-        HS_i[2, :] = [xw[1, k + 1], yw[1, k + 1], zw[1, k + 1]]
-        HS_i[3, :] = [xw[0, k + 1], yw[0, k + 1], zw[0, k + 1]]
+    operador = operador_influencia(HS, xcp, ycp, zcp, unvx, unvy, unvz, 'bloques',
+                                   bloque, memoria_max)
+    ultimo = {}
 
-        gsing = 1
-        u_hs, v_hs, w_hs, ud_hs, vd_hs, wd_hs = HSvel(HS_i, xcpi, ycpi, zcpi, gsing, k)
+    def aplicar(Gammas):
+        ultimo['aG'], ultimo['bG'] = operador(Gammas)
+        return ultimo['aG']
 
-        # Imagen reflejada
-        HS_i[:, 1] *= -1
-        u_hsL, v_hsL, w_hsL, ud_hsL, vd_hsL, wd_hsL = HSvel(HS_i, xcpi, ycpi, zcpi, -gsing, k)
+    Gammas, residuos, convergio = refinar(aplicar, lu32, RHS, tol, max_iter)
+    return Gammas, ultimo['bG'], residuos, convergio
 
-        # Superposición
-        u_hs += u_hsL
-        v_hs += v_hsL
-        w_hs += w_hsL
-        ud_hs += ud_hsL
-        vd_hs += vd_hsL
-        wd_hs += wd_hsL
 
-        a_coeffs[j, k] = unvxi * u_hs + unvyi * v_hs + unvzi * w_hs
-        b_coeffs[j, k] = unvxi * ud_hs + unvyi * vd_hs + unvzi * wd_hs
+def influencias_factorizadas(HS, xcp, ycp, zcp, unvx, unvy, unvz, cache=None,
+                             metricas=None):
+    """
+    a_coeffs, b_coeffs y la factorización LU de a_coeffs. Si se da una
+    CacheInfluencias y la geometría ya está guardada se cargan del disco
+    (memoria mapeada) sin ensamblar; si no, se ensamblan y se guardan.
+    Con metricas se miden las etapas 'ensamblaje' y 'factorizacion'.
+    """
+    if cache is not None:
+        with etapa(metricas, 'cache'):
+            clave = cache.clave(HS, xcp, ycp, zcp, unvx, unvy, unvz)
+            guardado = cache.cargar(clave)
+            contar('cache_aciertos' if guardado is not None else 'cache_fallos')
+        if guardado is not None:
+            return guardado
+
+    with etapa(metricas, 'ensamblaje'):
+        a_coeffs, b_coeffs = ensamblar_influencias(HS, xcp, ycp, zcp, unvx, unvy, unvz)
+    with etapa(metricas, 'factorizacion'):
+        lu = lu_factor(a_coeffs)
+        contar('lu_factor')
+    if cache is not None:
+        cache.guardar(clave, a_coeffs, b_coeffs, lu)
+    return a_coeffs, b_coeffs, lu
 
 
 # ============================================================
-# SOLUCIÓN DE LAS ECUACIONES
+# GEOMETRÍA Y SOLUCIÓN DE UN ALA COMPLETA
 # ============================================================
-Gammas = np.linalg.solve(a_coeffs, RHS)
-ws = np.dot(b_coeffs, Gammas)
+def espaciado(n, tipo='uniforme'):
+    """
+    n puntos entre 0 y 1. 'uniforme'; 'coseno' los agrupa en ambos
+    extremos; 'medio_coseno' los agrupa en 1 (la punta, en la envergadura).
+    Como la estela sale del vórtice ligado alineada con Alpha, paneles mucho
+    más angostos que c*sin(Alpha) dejan la matriz mal condicionada.
+    """
+    t = np.linspace(0, 1, n)
+    if tipo == 'uniforme':
+        return t
+    if tipo == 'coseno':
+        return 0.5 * (1 - np.cos(pi * t))
+    if tipo == 'medio_coseno':
+        return np.sin(0.5 * pi * t)
+    raise ValueError("Espaciado desconocido: %s" % tipo)
+
+
+def distribucion_envergadura(SwA, Tpr, b2, DihA, twist, Croot, Ny,
+                             espaciado_y='uniforme', tabla=None):
+    """
+    Estaciones de la semiala: y, cuerda, torsión y posición del borde de
+    ataque (x_ba, z_ba). Sin tabla, la cuerda y la torsión varían
+    linealmente y la flecha y el diedro son constantes. tabla es un
+    diccionario con 'eta' (fracción de semienvergadura, creciente) y
+    cualquiera de 'cuerda', 'twist', 'SwA' o 'DihA', que se interpolan
+    linealmente; la flecha y el diedro locales se integran en y.
+    """
+    eta = espaciado(Ny, espaciado_y)
+    y = b2 * eta
+    cuerda = Croot * (1 + (Tpr - 1) * eta)
+    torsion = twist * eta
+    flecha = np.full(Ny, np.tan(SwA))
+    diedro = np.full(Ny, np.tan(DihA))
+
+    if tabla is not None:
+        eta_t = np.asarray(tabla['eta'], dtype=float)
+        if 'cuerda' in tabla:
+            cuerda = np.interp(eta, eta_t, tabla['cuerda'])
+        if 'twist' in tabla:
+            torsion = np.interp(eta, eta_t, tabla['twist'])
+        if 'SwA' in tabla:
+            flecha = np.tan(np.interp(eta, eta_t, tabla['SwA']))
+        if 'DihA' in tabla:
+            diedro = np.tan(np.interp(eta, eta_t, tabla['DihA']))
+
+    # Integral (trapecios) de las pendientes locales
+    dy = np.diff(y)
+    x_ba = np.concatenate([[0], np.cumsum(0.5 * (flecha[1:] + flecha[:-1]) * dy)])
+    z_ba = np.concatenate([[0], np.cumsum(0.5 * (diedro[1:] + diedro[:-1]) * dy)])
+    return y, cuerda, torsion, x_ba, z_ba
+
+
+def area_cmg(y, cuerda):
+    """
+    Área de la semiala y cuerda media aerodinámica, exactas para cuerda
+    lineal entre estaciones.
+    """
+    dy = np.diff(y)
+    c1, c2 = cuerda[:-1], cuerda[1:]
+    area = np.sum(0.5 * (c1 + c2) * dy)
+    cmg = np.sum((c1**2 + c1 * c2 + c2**2) * dy / 3) / area
+    return area, cmg
+
+
+def geometria_ala(SwA, Tpr, b2, DihA, twist, Croot, Nx, Ny, espaciado_x='uniforme',
+                  espaciado_y='uniforme', camber=None, tabla=None):
+    """
+    Malla de la semiala derecha (puntos de la cuerda por filas, de la
+    envergadura por columnas). espaciado_x agrupa los puntos en el borde
+    de ataque con 'medio_coseno'. camber es la línea media z/c: un arreglo
+    (Nx,) o (Nx, Ny) en las estaciones de la cuerda, o una función
+    camber(x/c, eta). La torsión gira cada sección alrededor de su borde
+    de ataque. Devuelve xgr, ygr, zgr de forma (Nx, Ny).
+    """
+    y, cuerda, torsion, x_ba, z_ba = distribucion_envergadura(
+        SwA, Tpr, b2, DihA, twist, Croot, Ny, espaciado_y, tabla)
+
+    # Fracción de cuerda, agrupada hacia el borde de ataque
+    xc = 1 - espaciado(Nx, espaciado_x)[::-1]
+
+    if camber is None:
+        zc = np.zeros((Nx, Ny))
+    elif callable(camber):
+        zc = np.broadcast_to(camber(xc[:, None], y[None, :] / b2), (Nx, Ny))
+    else:
+        zc = np.broadcast_to(np.reshape(camber, (Nx, -1)), (Nx, Ny))
 
-# Cálculo de sustentación e inducida
-L = 0.0
-Di = 0.0
+    xj = cuerda * xc[:, None]
+    zj = cuerda * zc
 
-for j in range(Ny - 1):
-    Delta_y = ygr[0, j + 1] - ygr[0, j]
-    Delta_L = rho * Vinf * Gammas[j] * Delta_y
-    Delta_D = rho * ws[j] * Gammas[j] * Delta_y
-    L += Delta_L
-    Di += Delta_D
+    x_rt = xj * np.cos(torsion) - zj * np.sin(torsion)
+    z_rt = xj * np.sin(torsion) + zj * np.cos(torsion)
 
-CL = 2 * L / (0.5 * rho * Vinf**2 * AWing)
-print("Coeficiente de Sustentación (CL):", CL)
+    xgr = x_rt + x_ba
+    ygr = np.broadcast_to(y, (Nx, Ny)).copy()
+    zgr = z_rt + z_ba
+    return xgr, ygr, zgr
+
+
+def resolver_ala(SwA=45 * (pi / 180), Tpr=1, b2=5, DihA=0, twist=0, Croot=None,
+                 Vinf=10, Alpha=5 * (pi / 180), rho=1.225, Nx=5, Ny=5,
+                 Solver='directo', cache=None, malla=None, tol_mixto=1e-10,
+                 metricas=None):
+    """
+    Arma la malla, las herraduras y los puntos de colocación de un ala,
+    resuelve las circulaciones y calcula cargas y coeficientes. Croot por
+    defecto es 0.2 veces la envergadura. Solver: 'directo' ensambla
+    a_coeffs y b_coeffs; 'mixto' factoriza a_coeffs en float32 y refina en
+    float64 hasta tol_mixto (convergio indica si lo alcanzó); 'gmres'
+    resuelve sin matrices (info es el código de salida de gmres: 0 si
+    convergió). cache es una
+    CacheInfluencias opcional para no reensamblar geometrías ya resueltas.
+    malla son opciones adicionales de geometria_ala (espaciado_x,
+    espaciado_y, camber, tabla). metricas es una Metricas (o True para
+    crear una) en la que se registra cada etapa: geometria, estela,
+    colocacion, ensamblaje, factorizacion, solucion y cargas.
+    Devuelve un diccionario con los resultados y la geometría.
+    """
+    if Solver not in ('directo', 'mixto', 'gmres'):
+        raise ValueError("Solver desconocido: %s" % Solver)
+    if metricas is True:
+        metricas = Metricas()
+    b = 2 * b2
+    if Croot is None:
+        Croot = 0.2 * b
+    malla = malla or {}
+
+    with etapa(metricas, 'geometria'):
+        # Cuerda media geométrica y área
+        y_est, cuerda_est = distribucion_envergadura(
+            SwA, Tpr, b2, DihA, twist, Croot, Ny, malla.get('espaciado_y', 'uniforme'),
+            malla.get('tabla'))[:2]
+        A_semi, CMG = area_cmg(y_est, cuerda_est)
+        AWing = 2 * A_semi
+
+        # Vector de velocidad libre
+        Vinf_vector = np.array([Vinf * np.cos(Alpha), 0, Vinf * np.sin(Alpha)])
+
+        xgr, ygr, zgr = geometria_ala(SwA, Tpr, b2, DihA, twist, Croot, Nx, Ny, **malla)
+
+    with etapa(metricas, 'estela'):
+        # Estela de cada fila de paneles, forma (2, Nx-1, Ny)
+        W_farP = 20 * b
+        W_vector = np.array([W_farP * np.cos(Alpha), 0, W_farP * np.sin(Alpha)])
+        xw, yw, zw = lineas_vortices(xgr, ygr, zgr, W_vector)
+
+        # Vértices de todas las herraduras (forma ((Nx-1)*(Ny-1), 4, 3))
+        HS = herraduras(xw, yw, zw)
+
+    with etapa(metricas, 'colocacion'):
+        xcp, ycp, zcp, unvx, unvy, unvz = puntos_colocacion(xgr, ygr, zgr)
+
+        # Condición de impermeabilidad
+        RHS = -(Vinf_vector[0] * unvx + Vinf_vector[1] * unvy + Vinf_vector[2] * unvz)
+
+    a_coeffs = b_coeffs = lu = info = convergio = None
+    if Solver == 'directo':
+        a_coeffs, b_coeffs, lu = influencias_factorizadas(HS, xcp, ycp, zcp, unvx,
+                                                          unvy, unvz, cache, metricas)
+        with etapa(metricas, 'solucion'):
+            Gammas = lu_solve(lu, RHS)
+            ws = np.dot(b_coeffs, Gammas)
+        residuos = None
+    else:
+        # Sin matrices el ensamblaje queda dentro de la solución
+        with etapa(metricas, 'solucion'):
+            if Solver == 'mixto':
+                Gammas, ws, residuos, convergio = resolver_precision_mixta(
+                    HS, xcp, ycp, zcp, unvx, unvy, unvz, RHS, tol_mixto)
+            elif Solver == 'gmres':
+                Gammas, ws, residuos, info = resolver_gmres(HS, xcp, ycp, zcp, unvx, unvy,
+                                                            unvz, RHS, Ny - 1)
+
+    with etapa(metricas, 'cargas'):
+        # Cálculo de sustentación e inducida (por panel)
+        Delta_y = np.tile(ygr[0, 1:] - ygr[0, :-1], Nx - 1)
+        Delta_L = rho * Vinf * Gammas * Delta_y
+        Delta_D = rho * ws * Gammas * Delta_y
+
+        L = np.sum(Delta_L)
+        Di = np.sum(Delta_D)
+
+        # Carga por franja en la envergadura (suma de las filas en la cuerda)
+        L_franja = Delta_L.reshape(Nx - 1, Ny - 1).sum(axis=0)
+
+        # Momento de cabeceo respecto al borde de ataque de la raíz
+        x_ligado = 0.5 * (HS[:, 1, 0] + HS[:, 2, 0])
+        M_cab = -np.sum(Delta_L * x_ligado)
+
+        CL = 2 * L / (0.5 * rho * Vinf**2 * AWing)
+        CM = 2 * M_cab / (0.5 * rho * Vinf**2 * AWing * CMG)
+
+    return dict(CL=CL, CM=CM, L=L, Di=Di, L_franja=L_franja, Gammas=Gammas, ws=ws,
+                residuos=residuos, info=info, convergio=convergio, a_coeffs=a_coeffs,
+                b_coeffs=b_coeffs, lu=lu, Delta_y=Delta_y, AWing=AWing, CMG=CMG,
+                xgr=xgr, ygr=ygr, zgr=zgr, xw=xw, yw=yw, zw=zw, W_vector=W_vector, HS=HS,
+                xcp=xcp, ycp=ycp, zcp=zcp, unvx=unvx, unvy=unvy, unvz=unvz,
+                metricas=metricas)
+
+
+# ============================================================
+# ALA COMPLETA: DERRAPE, ROLIDO Y GEOMETRÍA ASIMÉTRICA
+# ============================================================
+def resolver_ala_completa(SwA=45 * (pi / 180), Tpr=1, b2=5, DihA=0, twist=0,
+                          Croot=None, Vinf=10, Alpha=5 * (pi / 180), rho=1.225,
+                          Nx=5, Ny=5, beta=0, p=0, izquierda=None, malla=None):
+    """
+    Resuelve las dos semialas sin imponer simetría en el flujo. beta es el
+    ángulo de derrape (viento con componente -y para beta > 0) y p la
+    velocidad angular alrededor del eje x [rad/s], que suma -p x r a la
+    velocidad libre en cada punto. malla son opciones adicionales de
+    geometria_ala. izquierda es un diccionario con los parámetros
+    geométricos (incluidos los de malla) de la semiala izquierda que
+    difieren de los de la derecha (p. ej. {'twist': ...}).
+
+    La estela sigue en el plano de simetría, así que si la geometría es
+    simétrica la matriz completa es [[D, I], [I, D]] y el sistema se separa
+    en una parte simétrica (D + I) y una antisimétrica (D - I), cada una
+    del tamaño de la semiala. Si no, se resuelve el sistema completo.
+    Devuelve un diccionario con CL, Di, los coeficientes de rodadura Cl y
+    de guiñada Cn (de la resistencia inducida), ambos respecto a S*b, y
+    las cargas por franja de punta izquierda a punta derecha.
+    """
+    b = 2 * b2
+    if Croot is None:
+        Croot = 0.2 * b
+    der = dict(SwA=SwA, Tpr=Tpr, b2=b2, DihA=DihA, twist=twist, Croot=Croot,
+               **(malla or {}))
+    izq = dict(der, **(izquierda or {}))
+
+    Vinf_vector = Vinf * np.array([np.cos(Alpha) * np.cos(beta), -np.sin(beta),
+                                   np.sin(Alpha) * np.cos(beta)])
+    W_farP = 20 * b
+    W_vector = np.array([W_farP * np.cos(Alpha), 0, W_farP * np.sin(Alpha)])
+
+    # Cada semiala se arma del lado y > 0; la izquierda se refleja después
+    mallas = []
+    for par in (der, izq):
+        xgr, ygr, zgr = geometria_ala(Nx=Nx, Ny=Ny, **par)
+        xw, yw, zw = lineas_vortices(xgr, ygr, zgr, W_vector)
+        cp = np.column_stack(puntos_colocacion(xgr, ygr, zgr))
+        mallas.append((np.stack([xgr, ygr, zgr]), herraduras(xw, yw, zw), cp))
+    simetrica = all(np.array_equal(a, c) for a, c in zip(mallas[0], mallas[1]))
+
+    HS_der, cp_der = mallas[0][1], mallas[0][2]
+    HS_izq, cp_izq = reflejar_herraduras(mallas[1][1]), mallas[1][2].copy()
+    cp_izq[:, [1, 4]] *= -1
+
+    # Velocidad libre más la debida al rolido, -(p, 0, 0) x r
+    def velocidad_libre(r):
+        V = np.tile(Vinf_vector, (len(r), 1))
+        V[:, 1] += p * r[:, 2]
+        V[:, 2] -= p * r[:, 1]
+        return V
+
+    RHS_der = -np.sum(velocidad_libre(cp_der[:, :3]) * cp_der[:, 3:], axis=1)
+    RHS_izq = -np.sum(velocidad_libre(cp_izq[:, :3]) * cp_izq[:, 3:], axis=1)
+
+    if simetrica:
+        D, b_D = ensamblar_influencias(HS_der, *cp_der.T, simetria=False)
+        I, b_I = ensamblar_influencias(HS_izq, *cp_der.T, simetria=False)
+        G_s = lu_solve(lu_factor(D + I), 0.5 * (RHS_der + RHS_izq))
+        G_a = lu_solve(lu_factor(D - I), 0.5 * (RHS_der - RHS_izq))
+        w_s = np.dot(b_D + b_I, G_s)
+        w_a = np.dot(b_D - b_I, G_a)
+        Gammas = np.concatenate([G_s + G_a, G_s - G_a])
+        ws = np.concatenate([w_s + w_a, w_s - w_a])
+    else:
+        HS = np.concatenate([HS_der, HS_izq])
+        cp = np.concatenate([cp_der, cp_izq])
+        a_coeffs, b_coeffs = ensamblar_influencias(HS, *cp.T, simetria=False)
+        Gammas = np.linalg.solve(a_coeffs, np.concatenate([RHS_der, RHS_izq]))
+        ws = np.dot(b_coeffs, Gammas)
+
+    # Kutta-Joukowski en el vórtice ligado con la velocidad libre local
+    HS = np.concatenate([HS_der, HS_izq])
+    dl = HS[:, 2] - HS[:, 1]
+    r_ligado = 0.5 * (HS[:, 1] + HS[:, 2])
+    F = rho * Gammas[:, None] * np.cross(velocidad_libre(r_ligado), dl)
+    Delta_L = F @ np.array([-np.sin(Alpha), 0, np.cos(Alpha)])
+    Delta_D = rho * ws * Gammas * dl[:, 1]
+
+    L = np.sum(Delta_L)
+    Di = np.sum(Delta_D)
+
+    AWing = 0
+    for par in (der, izq):
+        y_est, cuerda_est = distribucion_envergadura(
+            par['SwA'], par['Tpr'], par['b2'], par['DihA'], par['twist'], par['Croot'],
+            Ny, par.get('espaciado_y', 'uniforme'), par.get('tabla'))[:2]
+        AWing += area_cmg(y_est, cuerda_est)[0]
+    q_S = 0.5 * rho * Vinf**2 * AWing
+    CL = L / q_S
+    Cl = np.sum(Delta_L * r_ligado[:, 1]) / (q_S * b)
+    Cn = -np.sum(Delta_D * r_ligado[:, 1]) / (q_S * b)
+
+    # Carga por franja de punta izquierda a punta derecha
+    n = len(HS_der)
+    L_der = Delta_L[:n].reshape(Nx - 1, Ny - 1).sum(axis=0)
+    L_izq = Delta_L[n:].reshape(Nx - 1, Ny - 1).sum(axis=0)
+    L_franja = np.concatenate([L_izq[::-1], L_der])
+    y_franja = r_ligado[:, 1].reshape(2, Nx - 1, Ny - 1)[:, 0]
+    y_franja = np.concatenate([y_franja[1, ::-1], y_franja[0]])
+
+    return dict(CL=CL, Di=Di, Cl=Cl, Cn=Cn, L=L, L_franja=L_franja, y_franja=y_franja,
+                Gammas=Gammas, ws=ws, HS=HS, simetrica=simetrica)
 
 
 # ============================================================
 # VISUALIZACIÓN 3D
 # ============================================================
-fig1 = plt.figure()
-ax = plt.axes(projection='3d')
-ax.set_proj_type('ortho')
-set_axes_equal(ax)
-
-# Superficie y vórtices
-ax.plot_wireframe(xgr, ygr, zgr, color='black')
-ax.plot_wireframe(xgr, -ygr, zgr, color='black')
-ax.plot_wireframe(xw, yw, zw, color='blue', alpha=0.2)
-ax.plot_wireframe(xw, -yw, zw, color='blue', alpha=0.2)
-
-# Puntos de control y normales
-ax.scatter3D(xcp, ycp, zcp, color='red', s=100)
-ax.quiver(xcp, ycp, zcp, unvx, unvy, unvz, arrow_length_ratio=0.1)
-
-ax.set_xlabel('$X$')
-ax.set_ylabel('$Y$')
-ax.set_zlabel('$Z$')
-plt.show()
+def graficar_malla(res, archivo=None):
+    """
+    Dibuja la superficie, las estelas, los puntos de colocación y las
+    normales de una solución de resolver_ala. Si se da un archivo la figura
+    se guarda sin abrir ventanas.
+    """
+    plt = pyplot(archivo is not None)
+    xgr, ygr, zgr = res['xgr'], res['ygr'], res['zgr']
+    xw, yw, zw = res['xw'], res['yw'], res['zw']
+
+    fig1 = plt.figure()
+    ax = fig1.add_subplot(projection='3d')
+    ax.set_proj_type('ortho')
+    set_axes_equal(ax)
+
+    # Superficie y vórtices
+    ax.plot_wireframe(xgr, ygr, zgr, color='black')
+    ax.plot_wireframe(xgr, -ygr, zgr, color='black')
+    for i in range(xw.shape[1]):
+        ax.plot_wireframe(xw[:, i], yw[:, i], zw[:, i], color='blue', alpha=0.2)
+        ax.plot_wireframe(xw[:, i], -yw[:, i], zw[:, i], color='blue', alpha=0.2)
+
+    # Puntos de control y normales
+    ax.scatter3D(res['xcp'], res['ycp'], res['zcp'], color='red', s=100)
+    ax.quiver(res['xcp'], res['ycp'], res['zcp'], res['unvx'], res['unvy'], res['unvz'],
+              arrow_length_ratio=0.1)
+
+    ax.set_xlabel('$X$')
+    ax.set_ylabel('$Y$')
+    ax.set_zlabel('$Z$')
+    terminar(fig1, archivo)
+    return fig1
+
+
+if __name__ == "__main__":
+    # ============================================================
+    # PARÁMETROS DEL FLUJO
+    # ============================================================
+    Vinf = 10                  # Velocidad del flujo libre
+    Alpha = 5 * (pi / 180)     # Ángulo de ataque [rad]
+    rho = 1.225                # Densidad del aire [kg/m³]
+
+    # ============================================================
+    # PARÁMETROS GEOMÉTRICOS DEL ALA
+    # ============================================================
+    SwA = 45 * (pi / 180)      # Ángulo de flecha
+    Tpr = 1                    # Relación de estrechamiento
+    b2 = 5                     # Semienvergadura
+    b = 2 * b2                 # Envergadura total
+
+    DihA = 0 * (pi / 180)      # Ángulo diedro
+    twist = 0 * (pi / 180)     # Ángulo de torsión
+
+    Croot = 0.2 * b            # Cuerda en la raíz
+
+    # Discretización de la superficie
+    Ny = 5     # Puntos en la envergadura (Ny-1 paneles)
+    Nx = 5     # Puntos en la cuerda (Nx-1 paneles)
+
+    # 'directo': ensambla a_coeffs y b_coeffs; 'mixto': float32 con
+    # refinamiento en float64; 'gmres': sin matrices
+    Solver = 'directo'
+
+    # ============================================================
+    # SOLUCIÓN DE LAS ECUACIONES
+    # ============================================================
+    res = resolver_ala(SwA, Tpr, b2, DihA, twist, Croot, Vinf, Alpha, rho, Nx, Ny,
+                       Solver, metricas=True)
+    print(res['metricas'])
+    xgr, ygr, zgr = res['xgr'], res['ygr'], res['zgr']
+    unvx, unvy, unvz = res['unvx'], res['unvy'], res['unvz']
+    HS, Gammas = res['HS'], res['Gammas']
+
+    if Solver == 'mixto':
+        print("Iteraciones de refinamiento:", len(res['residuos']) - 1,
+              "- residuo final:", res['residuos'][-1])
+    elif Solver != 'directo':
+        print("Iteraciones GMRES:", len(res['residuos']), "- residuo final:",
+              res['residuos'][-1])
+    print("Coeficiente de Sustentación (CL):", res['CL'])
+    print("Coeficiente de Momento (CM, borde de ataque raíz):", res['CM'])
+
+    # Resistencia inducida en el plano de Trefftz y eficiencia de envergadura
+    y_franja, dy_franja, cuerda_franja = franjas(xgr, ygr, zgr)
+    cargas = cargas_envergadura(Gammas, res['ws'], y_franja, dy_franja, cuerda_franja,
+                                Vinf, rho, res['AWing'], HS, res['W_vector'])
+    print("CDi (Trefftz):", cargas['CDi'], "- e:", cargas['e'])
+    print("Momento flector en la raíz [N m]:", cargas['M_raiz'])
+
+    # ============================================================
+    # POLAR DE SUSTENTACIÓN
+    # ============================================================
+    # La estela se mantiene alineada con Alpha, así que a_coeffs se reutiliza
+    if Solver == 'directo':
+        Alphas_polar = np.linspace(-5, 15, 201) * (pi / 180)
+        CL_polar, Di_polar, L_franja_polar, Gammas_polar, lu_a = polar_alfa(
+            res['a_coeffs'], res['b_coeffs'], unvx, unvy, unvz, res['Delta_y'],
+            res['AWing'], Alphas_polar, Vinf, rho, Ny - 1, lu=res['lu'])
+
+        CL_alfa = np.polyfit(Alphas_polar, CL_polar, 1)[0]
+        print("Pendiente de sustentación (dCL/dAlpha) [1/rad]:", CL_alfa)
+
+    # ============================================================
+    # DERIVADAS LATERALES (ALA COMPLETA)
+    # ============================================================
+    # El problema es lineal en beta y p, basta un caso de cada uno
+    beta_ref = 1 * (pi / 180)
+    p_ref = 0.1 * 2 * Vinf / b
+    lat_beta = resolver_ala_completa(SwA, Tpr, b2, DihA, twist, Croot, Vinf, Alpha,
+                                     rho, Nx, Ny, beta=beta_ref)
+    lat_p = resolver_ala_completa(SwA, Tpr, b2, DihA, twist, Croot, Vinf, Alpha,
+                                  rho, Nx, Ny, p=p_ref)
+    print("Cl_beta [1/rad]:", lat_beta['Cl'] / beta_ref)
+    print("Cl_p (p b / 2V) [1/rad]:", lat_p['Cl'] / (p_ref * b / (2 * Vinf)))
+
+    # ============================================================
+    # VELOCIDAD INDUCIDA FUERA DEL ALA (ÁRBOL DE VÓRTICES)
+    # ============================================================
+    # Downwash a lo largo de una línea en la posición de la cola
+    P1_seg, P2_seg, G_seg, estela_seg = segmentos_herraduras(HS, Gammas)
+    arbol = ArbolVortices(P1_seg, P2_seg, G_seg, estela_seg, tol=1e-4)
+
+    y_cola = np.linspace(-b2, b2, 41)
+    P_cola = np.column_stack([np.full_like(y_cola, xgr[-1, 0] + 2 * Croot),
+                              y_cola, np.zeros_like(y_cola)])
+    u_cola, v_cola, w_cola, udw_cola, vdw_cola, wdw_cola = arbol.velocidad(P_cola)
+    print("Downwash medio en la cola [m/s]:", np.mean(w_cola))
+
+    # ============================================================
+    # VISUALIZACIÓN 3D
+    # ============================================================
+    graficar_malla(res)
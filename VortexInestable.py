@@ -0,0 +1,230 @@
+import numpy as np
+from math import pi
+from scipy.linalg import lu_factor, lu_solve
+
+from VortexHs import coeficientes_influencia, puntos_colocacion
+from VortexTree import vel_segmentos
+
+
+# ============================================================
+# ANILLOS DE VÓRTICES DEL ALA Y DE LA ESTELA
+# ============================================================
+def anillos_ligados(xgr, ygr, zgr):
+    """
+    Anillos de vórtices de la semiala: el lado delantero de cada anillo
+    está a 1/4 de su panel y el trasero a 1/4 del panel siguiente (en la
+    última fila, a 1/4 de panel detrás del borde de fuga). Devuelve los
+    vértices ((Nx-1)*(Ny-1), 4, 3) en el orden de herraduras(), la cuerda
+    de cada panel y la línea de desprendimiento (Ny, 3).
+    """
+    P = np.stack([xgr, ygr, zgr], axis=-1)     # (Nx, Ny, 3)
+    Q = P[:-1] + 0.25 * (P[1:] - P[:-1])
+    Q = np.concatenate([Q, (P[-1] + 0.25 * (P[-1] - P[-2]))[None]])
+
+    # Vértices en sentido: delantero (+y), lado exterior, trasero, lado interior
+    anillos = np.stack([Q[:-1, :-1], Q[:-1, 1:], Q[1:, 1:], Q[1:, :-1]], axis=2)
+    dc = np.linalg.norm(P[1:] - P[:-1], axis=-1)
+    dc = 0.5 * (dc[:, :-1] + dc[:, 1:])
+    return anillos.reshape(-1, 4, 3), dc.ravel(), Q[-1]
+
+
+def anillos_estela(Q_fuga, w_dir, paso, n_filas):
+    """
+    Filas de anillos de estela detrás de la línea de desprendimiento, cada
+    una de largo `paso` en la dirección w_dir. La fila k (desde 0) es la
+    que se desprendió hace k+1 pasos. Devuelve (n_filas*(Ny-1), 4, 3).
+    """
+    k = np.arange(n_filas + 1)[:, None, None]
+    W = Q_fuga[None] + k * paso * np.asarray(w_dir)[None, None]
+    anillos = np.stack([W[:-1, :-1], W[:-1, 1:], W[1:, 1:], W[1:, :-1]], axis=2)
+    return anillos.reshape(-1, 4, 3)
+
+
+def matriz_anillos(anillos, xcp, ycp, zcp, unvx, unvy, unvz, simetria=True,
+                   memoria_max=2**27):
+    """
+    Velocidad normal en los puntos de colocación inducida por cada anillo
+    con circulación unitaria (más su imagen reflejada si simetria=True).
+    Se evalúa por bloques de puntos. Devuelve (puntos, anillos).
+    """
+    anillos = np.asarray(anillos, dtype=float)
+    A = anillos.reshape(-1, 3)
+    B = np.roll(anillos, -1, axis=1).reshape(-1, 3)
+    G = np.ones(len(A))
+    if simetria:
+        # Imagen: vértices reflejados en el mismo orden con -Gamma
+        A_img, B_img = A * [1, -1, 1], B * [1, -1, 1]
+        A, B, G = np.concatenate([A, A_img]), np.concatenate([B, B_img]), \
+            np.concatenate([G, -G])
+
+    P = np.column_stack([xcp, ycp, zcp])
+    nv = np.column_stack([unvx, unvy, unvz])
+    n, m, r = len(P), len(A), len(anillos)
+    bloque = max(1, int(memoria_max // (20 * 8 * 3 * m)))
+
+    C = np.zeros((n, r))
+    for i0 in range(0, n, bloque):
+        i1 = min(i0 + bloque, n)
+        nb = i1 - i0
+        vel = vel_segmentos(np.repeat(P[i0:i1], m, axis=0), np.tile(A, (nb, 1)),
+                            np.tile(B, (nb, 1)), np.tile(G, nb)).reshape(nb, m, 3)
+        vn = np.einsum('ijk,ik->ij', vel, nv[i0:i1])
+        # Los segmentos de cada anillo (y de su imagen) son consecutivos
+        C[i0:i1] = vn.reshape(nb, -1, r, 4).sum(axis=(1, 3))
+    return C
+
+
+# ============================================================
+# VLM NO ESTACIONARIO
+# ============================================================
+class VLMInestable:
+    """
+    Red de vórtices no estacionaria sobre la semiala (con imagen simétrica).
+    En cada paso la última fila de anillos desprende una fila de estela con
+    su circulación del paso anterior, y la estela se desplaza Vinf*dt en la
+    dirección de la corriente media. Como la estela no se deforma, la
+    geometría de la fila de edad k respecto al ala es siempre la misma: su
+    influencia se calcula una sola vez y en cada paso sólo se corren las
+    circulaciones, así que el costo por paso no crece con el tiempo. Las
+    filas de más de n_estela pasos se unen a una herradura semi-infinita
+    (con la circulación de la última fila que se unió), igual a la estela
+    estacionaria de VortexHs.
+
+    El movimiento entra en la condición de impermeabilidad sobre la malla
+    fija (pequeñas perturbaciones): cabeceo theta(t) alrededor de x_pivote,
+    desplazamiento vertical h(t) y ráfaga vertical rafaga(x, t).
+    """
+
+    def __init__(self, xgr, ygr, zgr, Vinf=10, Alpha=5 * (pi / 180), dt=None,
+                 rho=1.225, n_estela=None, largo_estela=10, x_pivote=0.0):
+        self.Vinf, self.Alpha, self.rho = Vinf, Alpha, rho
+        self.x_pivote = x_pivote
+        self.w_dir = np.array([np.cos(Alpha), 0, np.sin(Alpha)])
+        self.n_franjas = xgr.shape[1] - 1
+
+        self.anillos, self.dc, Q_fuga = anillos_ligados(xgr, ygr, zgr)
+        (self.xcp, self.ycp, self.zcp,
+         self.unvx, self.unvy, self.unvz) = puntos_colocacion(xgr, ygr, zgr)
+        cp = (self.xcp, self.ycp, self.zcp, self.unvx, self.unvy, self.unvz)
+
+        # Por defecto el paso es el tiempo que tarda el flujo en recorrer un panel
+        if dt is None:
+            dt = np.mean(self.dc) / Vinf
+        self.dt = dt
+        paso = Vinf * dt
+        b = 2 * np.max(ygr)
+        if n_estela is None:
+            n_estela = max(1, int(np.ceil(largo_estela * b / paso)))
+        self.n_estela = n_estela
+
+        # Matrices de influencia: se calculan y factorizan una sola vez
+        self.lu = lu_factor(matriz_anillos(self.anillos, *cp))
+        estela = anillos_estela(Q_fuga, self.w_dir, paso, n_estela)
+        self.C_estela = matriz_anillos(estela, *cp)
+
+        W_fin = Q_fuga + n_estela * paso * self.w_dir
+        lejos = W_fin + 20 * b * self.w_dir
+        HS_lejos = np.stack([lejos[:-1], W_fin[:-1], W_fin[1:], lejos[1:]], axis=1)
+        self.C_lejos = coeficientes_influencia(HS_lejos, *cp)[0]
+
+        # Ancho de la franja de cada panel y área de las dos semialas
+        dy = ygr[0, 1:] - ygr[0, :-1]
+        self.Delta_y = np.tile(dy, xgr.shape[0] - 1)
+        self.AWing = 2 * np.sum(self.dc.reshape(-1, self.n_franjas).sum(axis=0) * dy)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Arranque impulsivo: sin estela y sin circulación."""
+        self.t = 0.0
+        self.G_estela = np.zeros((self.n_estela, self.n_franjas))
+        self.G_lejos = np.zeros(self.n_franjas)
+        self.Gammas = np.zeros(len(self.anillos))
+
+    def velocidad_relativa(self, t, theta=None, h=None, rafaga=None):
+        """
+        Velocidad del aire relativa al ala en los puntos de colocación.
+        theta, h y rafaga son funciones del tiempo (rafaga también de x);
+        las derivadas se toman por diferencias centradas.
+        """
+        d = 0.5 * self.dt
+        th = 0.0 if theta is None else theta(t)
+        th_p = 0.0 if theta is None else (theta(t + d) - theta(t - d)) / (2 * d)
+        h_p = 0.0 if h is None else (h(t + d) - h(t - d)) / (2 * d)
+
+        a = self.Alpha + th
+        V = np.empty((len(self.xcp), 3))
+        V[:, 0] = self.Vinf * np.cos(a)
+        V[:, 1] = 0.0
+        V[:, 2] = self.Vinf * np.sin(a) - h_p + th_p * (self.xcp - self.x_pivote)
+        if rafaga is not None:
+            V[:, 2] += rafaga(self.xcp, t)
+        return V
+
+    def paso(self, theta=None, h=None, rafaga=None):
+        """
+        Avanza un paso de tiempo: resuelve las circulaciones del ala con la
+        estela actual, calcula las cargas y desprende una fila de estela.
+        Devuelve CL y la carga por franja.
+        """
+        t = self.t
+        V = self.velocidad_relativa(t, theta, h, rafaga)
+        RHS = -(V[:, 0] * self.unvx + V[:, 1] * self.unvy + V[:, 2] * self.unvz)
+        RHS -= self.C_estela @ self.G_estela.ravel() + self.C_lejos @ self.G_lejos
+
+        Gammas_ant = self.Gammas
+        self.Gammas = lu_solve(self.lu, RHS)
+
+        # Circulación del vórtice ligado de cada panel (diferencia entre filas)
+        G = self.Gammas.reshape(-1, self.n_franjas)
+        G_ligado = np.diff(G, axis=0, prepend=0).ravel()
+        dG_dt = (self.Gammas - Gammas_ant) / self.dt
+        Delta_L = self.rho * self.Delta_y * (self.Vinf * G_ligado + self.dc * dG_dt)
+
+        L_franja = Delta_L.reshape(-1, self.n_franjas).sum(axis=0)
+        CL = 2 * np.sum(Delta_L) / (0.5 * self.rho * self.Vinf**2 * self.AWing)
+
+        # Desprendimiento: la estela avanza una fila
+        self.G_lejos = self.G_estela[-1].copy() if self.n_estela else self.G_lejos
+        self.G_estela[1:] = self.G_estela[:-1]
+        self.G_estela[0] = G[-1]
+        self.t = t + self.dt
+        return CL, L_franja
+
+    def simular(self, n_pasos, theta=None, h=None, rafaga=None):
+        """
+        Corre n_pasos desde el estado actual. Devuelve t, CL (n_pasos,) y la
+        carga por franja (n_pasos, Ny-1).
+        """
+        t = self.t + self.dt * np.arange(n_pasos)
+        CL = np.zeros(n_pasos)
+        L_franja = np.zeros((n_pasos, self.n_franjas))
+        for k in range(n_pasos):
+            CL[k], L_franja[k] = self.paso(theta, h, rafaga)
+        return t, CL, L_franja
+
+
+if __name__ == "__main__":
+    import time
+    from VortexHs import resolver_ala
+
+    # Misma ala que el ejemplo de VortexHs
+    SwA, Tpr, b2, DihA, twist = 45 * (pi / 180), 1, 5, 0, 0
+    Nx, Ny, Vinf, Alpha = 5, 5, 10, 5 * (pi / 180)
+    est = resolver_ala(SwA, Tpr, b2, DihA, twist, None, Vinf, Alpha, Nx=Nx, Ny=Ny)
+
+    vlm = VLMInestable(est['xgr'], est['ygr'], est['zgr'], Vinf, Alpha)
+    print(f"dt = {vlm.dt:.4f} s, filas de estela = {vlm.n_estela}")
+
+    # Arranque impulsivo
+    t0 = time.perf_counter()
+    t, CL, L_franja = vlm.simular(400)
+    t1 = time.perf_counter()
+    print(f"Arranque impulsivo: CL(0) = {CL[0]:.4f}, CL(final) = {CL[-1]:.4f}, "
+          f"CL estacionario (herraduras) = {est['CL']:.4f}")
+    print(f"Tiempo por paso: {(t1 - t0) / len(t) * 1e3:.3f} ms")
+
+    # Cabeceo armónico de 2° alrededor del borde de ataque de la raíz
+    vlm.reiniciar()
+    w = 2.0
+    t, CL, L_franja = vlm.simular(600, theta=lambda t: 2 * (pi / 180) * np.sin(w * t))
+    print(f"Cabeceo: CL entre {CL[300:].min():.4f} y {CL[300:].max():.4f}")
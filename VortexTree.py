@@ -0,0 +1,481 @@
+# ============================================================
+#   EVALUADOR TIPO ÁRBOL (BARNES-HUT) PARA SEGMENTOS DE VÓRTICE
+# ============================================================
+# Calcula la velocidad inducida por muchos segmentos rectos de
+# vórtice (las herraduras de VortexHs.py) sobre mallas grandes
+# de puntos. Los grupos de segmentos lejanos se aproximan con un
+# desarrollo en serie (hasta el segundo momento) alrededor del
+# centro de cada nodo; los cercanos se suman exactamente con
+# Biot-Savart.
+# ============================================================
+
+import numpy as np
+from math import pi
+
+
+# ============================================================
+# VELOCIDAD INDUCIDA POR SEGMENTOS (SUMA DIRECTA)
+# ============================================================
+def vel_segmentos(P, A, B, G, tol=0.00005):
+    """
+    Velocidad inducida en los puntos P por los segmentos A -> B de
+    circulación G, evaluada par a par (todos los arreglos con la misma
+    primera dimensión). Usa el mismo corte de núcleo que HSvel.
+    """
+    r1 = P - A
+    r2 = P - B
+    r0 = B - A
+
+    r1Xr2 = np.cross(r1, r2)
+    norm2 = np.einsum('ij,ij->i', r1Xr2, r1Xr2)
+    r1n = np.sqrt(np.einsum('ij,ij->i', r1, r1))
+    r2n = np.sqrt(np.einsum('ij,ij->i', r2, r2))
+    r0n2 = np.einsum('ij,ij->i', r0, r0)
+
+    nucleo = (r1n < tol) | (r2n < tol) | (norm2 < tol**2 * r0n2)
+    norm2 = np.where(nucleo, 1.0, norm2)
+    r1n = np.where(nucleo, 1.0, r1n)
+    r2n = np.where(nucleo, 1.0, r2n)
+
+    k = G / (4.0 * pi * norm2) * (np.einsum('ij,ij->i', r0, r1) / r1n
+                                  - np.einsum('ij,ij->i', r0, r2) / r2n)
+    k[nucleo] = 0.0
+    return k[:, None] * r1Xr2
+
+
+def velocidad_directa(puntos, P1, P2, G, estela=None, tol=0.00005,
+                      memoria_max=2**27):
+    """
+    Suma directa O(puntos x segmentos), por bloques de puntos para acotar
+    la memoria. Sirve como referencia para el árbol. Devuelve u, v, w y la
+    parte debida sólo a los segmentos de estela (udw, vdw, wdw), igual que
+    HSvel.
+    """
+    puntos = np.atleast_2d(puntos)
+    if estela is None:
+        estela = np.zeros(len(G), dtype=bool)
+    n, m = len(puntos), len(G)
+    bloque = max(1, int(memoria_max // (20 * 8 * 3 * max(m, 1))))
+
+    v = np.zeros((n, 3))
+    vdw = np.zeros((n, 3))
+    for i0 in range(0, n, bloque):
+        i1 = min(i0 + bloque, n)
+        nb = i1 - i0
+        vel = vel_segmentos(np.repeat(puntos[i0:i1], m, axis=0), np.tile(P1, (nb, 1)),
+                            np.tile(P2, (nb, 1)), np.tile(G, nb), tol).reshape(nb, m, 3)
+        v[i0:i1] = vel.sum(axis=1)
+        vdw[i0:i1] = (vel * estela[None, :, None]).sum(axis=1)
+
+    return v[:, 0], v[:, 1], v[:, 2], vdw[:, 0], vdw[:, 1], vdw[:, 2]
+
+
+# ============================================================
+# FUSIÓN DE SEGMENTOS COINCIDENTES
+# ============================================================
+def fusionar_segmentos(P1, P2, G, estela):
+    """
+    Une los segmentos que comparten extremos (en cualquier sentido)
+    sumando sus circulaciones. En una malla de herraduras las piernas de
+    estela de paneles vecinos coinciden (y las de la raíz coinciden con su
+    imagen), así que esto reduce el número de segmentos sin aproximación.
+    Devuelve además, para cada segmento de entrada, el índice del segmento
+    fusionado al que pertenece y el signo con que aporta su circulación.
+    """
+    # Sentido canónico: el extremo "menor" primero
+    escala = max(np.abs(P1).max(), np.abs(P2).max(), 1.0)
+    k1 = np.round(P1 / escala, 9)
+    k2 = np.round(P2 / escala, 9)
+    primera = np.argmax(k1 != k2, axis=1)
+    filas = np.arange(len(k1))
+    invertir = k1[filas, primera] > k2[filas, primera]
+    A = np.where(invertir[:, None], P2, P1)
+    B = np.where(invertir[:, None], P1, P2)
+    signo = np.where(invertir, -1.0, 1.0)
+
+    clave = np.column_stack([np.where(invertir[:, None], k2, k1),
+                             np.where(invertir[:, None], k1, k2), estela])
+    _, primero, grupo = np.unique(clave, axis=0, return_index=True, return_inverse=True)
+    grupo = grupo.ravel()
+    G = np.bincount(grupo, signo * G, minlength=len(primero))
+    return A[primero], B[primero], G, estela[primero], grupo, signo
+
+
+# ============================================================
+# SUBDIVISIÓN DE SEGMENTOS LARGOS
+# ============================================================
+def subdividir_segmentos(P1, P2, G, estela, h0, razon=1.5, h_max=np.inf):
+    """
+    Parte los segmentos más largos que h0 en tramos cuya longitud crece
+    geométricamente (factor `razon`) desde ambos extremos hacia el centro,
+    sin pasar de h_max. Así las piernas de estela de 20*b quedan en tramos
+    cortos cerca del ala y más largos (hasta h_max) lejos de ella.
+    Biot-Savart es aditivo sobre un segmento recto, por lo que la
+    subdivisión no cambia el resultado exacto. Devuelve también el índice
+    del segmento original de cada tramo.
+    """
+    L = np.linalg.norm(P2 - P1, axis=1)
+    cortos = L <= h0
+
+    A = [P1[cortos]]
+    B = [P2[cortos]]
+    Gs = [G[cortos]]
+    Es = [estela[cortos]]
+    Os = [np.flatnonzero(cortos)]
+
+    # Las piernas de estela suelen compartir longitud: se agrupan
+    largos = np.flatnonzero(~cortos)
+    Lr = np.round(L[largos], 9)
+    for Lu in np.unique(Lr):
+        idx = largos[Lr == Lu]
+
+        # Fracciones de la mitad del segmento con crecimiento geométrico
+        h = h0 * razon ** np.arange(int(np.ceil(np.log(Lu / h0) / np.log(razon))) + 1)
+        h = np.minimum(h, h_max)
+        if h.sum() < Lu / 2:
+            h = np.append(h, np.full(int(np.ceil((Lu / 2 - h.sum()) / h_max)), h_max))
+        s = np.cumsum(h)
+        s = s[: np.searchsorted(s, Lu / 2) + 1]
+        s = s / s[-1] * (Lu / 2)
+        t = np.concatenate([[0.0], s, Lu - s[-2::-1], [Lu]]) / Lu
+        t = np.unique(t)
+
+        d = (P2[idx] - P1[idx])
+        A.append((P1[idx][:, None, :] + t[None, :-1, None] * d[:, None, :]).reshape(-1, 3))
+        B.append((P1[idx][:, None, :] + t[None, 1:, None] * d[:, None, :]).reshape(-1, 3))
+        Gs.append(np.repeat(G[idx], len(t) - 1))
+        Es.append(np.repeat(estela[idx], len(t) - 1))
+        Os.append(np.repeat(idx, len(t) - 1))
+
+    return (np.concatenate(A), np.concatenate(B), np.concatenate(Gs),
+            np.concatenate(Es), np.concatenate(Os))
+
+
+# ============================================================
+# ÁRBOL DE SEGMENTOS
+# ============================================================
+class ArbolVortices:
+    """
+    Octree sobre segmentos rectos de vórtice con momentos de orden cero,
+    uno y dos por nodo.
+
+    tol es el error relativo objetivo: un nodo de radio s se aproxima
+    desde un punto a distancia d si s / d < tol**(1/3), ya que el error
+    del desarrollo truncado escala como (s / d)**3.
+    """
+
+    def __init__(self, P1, P2, G, estela=None, tol=1e-3, hoja=32, h0=None,
+                 h_max=None, razon=1.5, tol_nucleo=0.00005, bloque=4096,
+                 max_pares=2**20):
+        P1 = np.asarray(P1, dtype=float)
+        P2 = np.asarray(P2, dtype=float)
+        G = np.asarray(G, dtype=float)
+        if estela is None:
+            estela = np.zeros(len(G), dtype=bool)
+        estela = np.asarray(estela, dtype=bool)
+
+        P1, P2, G, estela, self._grupo, self._signo = fusionar_segmentos(P1, P2, G, estela)
+        self.theta = tol ** (1.0 / 3.0)
+
+        # Longitud de referencia: el segmento ligado típico. Los tramos de
+        # estela no superan theta veces el tamaño del ala, de modo que a
+        # esa distancia ya se pueden agrupar, salvo que eso dé más de unos
+        # 64 tramos por segmento en promedio (la precisión no depende de
+        # h_max, sólo el costo).
+        L = np.linalg.norm(P2 - P1, axis=1)
+        if h0 is None:
+            h0 = np.median(L[~estela]) if np.any(~estela) else np.median(L)
+        if h_max is None:
+            ligados = np.concatenate([P1[~estela], P2[~estela]]) if np.any(~estela) else P1
+            h_max = max(self.theta * np.ptp(ligados, axis=0).max(), h0,
+                        L.sum() / (64 * len(L)))
+        (self.A, self.B, self.G, self.estela,
+         self._origen) = subdividir_segmentos(P1, P2, G, estela, h0, razon, h_max)
+
+        self.hoja = hoja
+        self.tol_nucleo = tol_nucleo
+        self.bloque = bloque
+        self.max_pares = max_pares
+        self._construir()
+
+    def _construir(self):
+        """
+        Construye el árbol de forma vectorizada. Los segmentos se ordenan
+        por clase de longitud (potencias de 2) y luego por código de Morton
+        de su punto medio; cada nodo ocupa un rango contiguo [inicio, fin).
+        La raíz separa las clases de longitud, para que cada hoja agrupe
+        tramos de tamaño parecido, y los niveles siguientes son octantes.
+        """
+        n = len(self.G)
+        M = (self.A + self.B) / 2
+        L = np.linalg.norm(self.B - self.A, axis=1)
+        clase = np.floor(np.log2(np.maximum(L, 1e-300) / max(L.min(), 1e-300))).astype(np.int64)
+
+        # Código de Morton con 21 bits por eje
+        lo = M.min(axis=0)
+        escala = max(np.ptp(M, axis=0).max(), 1e-300)
+        q = ((M - lo) / escala * (2**21 - 1)).astype(np.int64)
+        morton = np.zeros(n, dtype=np.int64)
+        for bit in range(21):
+            for eje in range(3):
+                morton |= ((q[:, eje] >> bit) & 1) << (3 * bit + eje)
+
+        orden = np.lexsort((morton, clase))
+        self.A, self.B = self.A[orden], self.B[orden]
+        self.G, self.estela = self.G[orden], self.estela[orden]
+        self._origen = self._origen[orden]
+        clase, morton, M = clase[orden], morton[orden], M[orden]
+
+        # Niveles: 0 = clase de longitud, 1..21 = octantes
+        inicio, fin, padre = [np.array([0])], [np.array([n])], [np.array([-1])]
+        nodo_de = np.zeros(n, dtype=np.int64)
+        activo = np.ones(n, dtype=bool)
+        n_nodos = 1
+        for nivel in range(22):
+            idx = np.flatnonzero(activo)
+            if len(idx) == 0:
+                break
+            llave = clase[idx] if nivel == 0 else morton[idx] >> (3 * (21 - nivel))
+            nuevo = np.ones(len(idx), dtype=bool)
+            nuevo[1:] = ((nodo_de[idx[1:]] != nodo_de[idx[:-1]])
+                         | (llave[1:] != llave[:-1]))
+            grupo = np.cumsum(nuevo) - 1
+            ini = idx[nuevo]
+            cuenta = np.bincount(grupo)
+
+            inicio.append(ini)
+            fin.append(ini + cuenta)
+            padre.append(nodo_de[ini])
+            nodo_de[idx] = n_nodos + grupo
+            n_nodos += len(ini)
+            activo[idx] = (cuenta > self.hoja)[grupo]
+
+        self.inicio = np.concatenate(inicio)
+        self.fin = np.concatenate(fin)
+        padre = np.concatenate(padre)
+
+        # Hijos de cada nodo (los hijos siempre tienen índice mayor)
+        self.n_hijos = np.bincount(padre[1:], minlength=n_nodos)
+        ancho = max(self.n_hijos.max(), 1)
+        self.hijos = np.full((n_nodos, ancho), -1)
+        hijo = np.arange(1, n_nodos)
+        pos = hijo - np.searchsorted(padre[1:], padre[1:])
+        self.hijos[padre[1:], pos - 1] = hijo
+
+        # Cajas de cada nodo: hojas primero y luego hacia la raíz
+        hojas = np.flatnonzero(self.n_hijos == 0)
+        self._hojas = hojas[np.argsort(self.inicio[hojas])]
+        self._padre = padre
+        self._niveles = np.cumsum([0] + [len(i) for i in inicio])
+        self._lo = lo
+        self._M = M
+        caja_lo = np.full((n_nodos, 3), np.inf)
+        caja_hi = np.full((n_nodos, 3), -np.inf)
+        for h0 in range(0, len(self._hojas), 4096):
+            grupo_h = self._hojas[h0:h0 + 4096]
+            s = slice(self.inicio[grupo_h[0]], self.fin[grupo_h[-1]])
+            cortes = self.inicio[grupo_h] - s.start
+            caja_lo[grupo_h] = np.minimum.reduceat(np.minimum(self.A[s], self.B[s]), cortes, axis=0)
+            caja_hi[grupo_h] = np.maximum.reduceat(np.maximum(self.A[s], self.B[s]), cortes, axis=0)
+        for a, b in self._hacia_raiz():
+            ids = np.arange(a, b)
+            np.minimum.at(caja_lo, padre[ids], caja_lo[ids])
+            np.maximum.at(caja_hi, padre[ids], caja_hi[ids])
+
+        self.centro = 0.5 * (caja_lo + caja_hi)
+        self.radio = 0.5 * np.linalg.norm(caja_hi - caja_lo, axis=1)
+        self._momentos()
+
+    def _hacia_raiz(self):
+        """
+        Rangos de índices de cada nivel, del más profundo al primero
+        (la raíz no se incluye).
+        """
+        return zip(self._niveles[-2:0:-1], self._niveles[-1:1:-1])
+
+    def _momentos(self):
+        """
+        Calcula los momentos de cada nodo para las circulaciones actuales:
+        sumas en las hojas (por tramos, para acotar la memoria) que se
+        propagan hacia los padres y se trasladan al centro de cada nodo.
+        """
+        n_nodos = len(self.inicio)
+        S = np.zeros((n_nodos, 2, 39))
+        for h0 in range(0, len(self._hojas), 4096):
+            grupo_h = self._hojas[h0:h0 + 4096]
+            s = slice(self.inicio[grupo_h[0]], self.fin[grupo_h[-1]])
+            cortes = self.inicio[grupo_h] - s.start
+            dl = self.B[s] - self.A[s]
+            m = self._M[s] - self._lo
+            Gdl = self.G[s][:, None] * dl
+            mm = m[:, :, None] * m[:, None, :] + dl[:, :, None] * dl[:, None, :] / 12
+            q0 = np.concatenate([Gdl,
+                                 (Gdl[:, :, None] * m[:, None, :]).reshape(-1, 9),
+                                 (Gdl[:, :, None, None] * mm[:, None]).reshape(-1, 27)], axis=1)
+            S[grupo_h, 0] = np.add.reduceat(q0, cortes, axis=0)
+            S[grupo_h, 1] = np.add.reduceat(q0 * self.estela[s][:, None], cortes, axis=0)
+        for a, b in self._hacia_raiz():
+            ids = np.arange(a, b)
+            np.add.at(S, self._padre[ids], S[ids])
+
+        # Momentos respecto al centro de cada nodo
+        c = self.centro - self._lo
+        S0 = S[:, :, :3]
+        S1 = S[:, :, 3:12].reshape(n_nodos, 2, 3, 3)
+        S2 = S[:, :, 12:].reshape(n_nodos, 2, 3, 3, 3)
+        self.mom = np.moveaxis(S0, 1, 0)
+        self.mom2 = np.moveaxis(S1 - S0[..., :, None] * c[:, None, None, :], 1, 0)
+        self.mom3 = np.moveaxis(S2 - S1[..., :, :, None] * c[:, None, None, None, :]
+                                - S1[..., :, None, :] * c[:, None, None, :, None]
+                                + S0[..., :, None, None] * c[:, None, None, :, None]
+                                * c[:, None, None, None, :], 1, 0)
+
+    def circulacion(self, G):
+        """
+        Cambia las circulaciones de los segmentos de entrada (mismo orden
+        con que se construyó el árbol) sin rehacer la geometría; sólo se
+        recalculan los momentos. Útil cuando el árbol se usa como operador.
+        """
+        G_fus = np.bincount(self._grupo, self._signo * np.asarray(G, dtype=float),
+                            minlength=self._grupo.max() + 1)
+        self.G = G_fus[self._origen]
+        self._momentos()
+
+    def _lejano(self, R, nodos):
+        """
+        Desarrollo en serie de la velocidad de los nodos vistos desde
+        R = x - centro, hasta el término de segundo momento. Devuelve
+        (2, pares, 3): total y estela.
+        """
+        Rn2 = np.einsum('ij,ij->i', R, R)
+        inv3 = Rn2 ** -1.5
+        inv5 = inv3 / Rn2
+        inv7 = inv5 / Rn2
+
+        out = np.empty((2, len(R), 3))
+        for q in range(2):
+            Am = self.mom[q, nodos]
+            D = self.mom2[q, nodos]
+            v = np.cross(Am, R) * inv3[:, None]
+
+            # T_bc = D_bc / R^3 - 3 (D R)_b R_c / R^5 ; se resta eps_abc T_bc
+            DR = np.einsum('pbd,pd->pb', D, R)
+            T = D * inv3[:, None, None] - 3 * DR[:, :, None] * R[:, None, :] * inv5[:, None, None]
+            v[:, 0] -= T[:, 1, 2] - T[:, 2, 1]
+            v[:, 1] -= T[:, 2, 0] - T[:, 0, 2]
+            v[:, 2] -= T[:, 0, 1] - T[:, 1, 0]
+
+            # U_bc = H_c,de Q_bde con H la segunda derivada de R / R^3;
+            # se suma eps_abc U_bc / 2
+            Q = self.mom3[q, nodos]
+            QR = np.einsum('pbce,pe->pbc', Q, R)
+            traza = np.einsum('pbdd->pb', Q)
+            QRR = np.einsum('pbc,pc->pb', QR, R)
+            U = (-3 * inv5[:, None, None] * (2 * QR + traza[:, :, None] * R[:, None, :])
+                 + 15 * inv7[:, None, None] * QRR[:, :, None] * R[:, None, :])
+            v[:, 0] += 0.5 * (U[:, 1, 2] - U[:, 2, 1])
+            v[:, 1] += 0.5 * (U[:, 2, 0] - U[:, 0, 2])
+            v[:, 2] += 0.5 * (U[:, 0, 1] - U[:, 1, 0])
+            out[q] = v / (4.0 * pi)
+        return out
+
+    def velocidad(self, puntos):
+        """
+        Velocidad inducida en los puntos (N, 3). Devuelve u, v, w y la
+        parte de estela udw, vdw, wdw (como HSvel).
+        """
+        puntos = np.atleast_2d(np.asarray(puntos, dtype=float))
+        vel = np.zeros((6, len(puntos)))
+        for i0 in range(0, len(puntos), self.bloque):
+            i1 = min(i0 + self.bloque, len(puntos))
+            vel[:, i0:i1] = self._velocidad_bloque(puntos[i0:i1])
+        return tuple(vel)
+
+    def _velocidad_bloque(self, puntos):
+        """
+        Recorre el árbol para un bloque de puntos manteniendo la lista de
+        pares (punto, nodo) pendientes.
+        """
+        n = len(puntos)
+        acum = np.zeros((2, 3, n))
+
+        t = np.arange(n)
+        nodo = np.zeros(n, dtype=int)
+        while len(t):
+            R = puntos[t] - self.centro[nodo]
+            d = np.sqrt(np.einsum('ij,ij->i', R, R))
+            lejos = self.radio[nodo] < self.theta * d
+            hoja = ~lejos & (self.n_hijos[nodo] == 0)
+
+            # Nodos lejanos: desarrollo en serie
+            if np.any(lejos):
+                v = self._lejano(R[lejos], nodo[lejos])
+                for q in range(2):
+                    for c in range(3):
+                        acum[q, c] += np.bincount(t[lejos], v[q, :, c], minlength=n)
+
+            # Hojas cercanas: suma directa sobre sus segmentos, por grupos
+            # de pares para acotar la memoria
+            th, nh = t[hoja], nodo[hoja]
+            cuenta = self.fin[nh] - self.inicio[nh]
+            grupo = np.cumsum(cuenta) // self.max_pares
+            for g in np.unique(grupo):
+                en_g = grupo == g
+                cg = cuenta[en_g]
+                tp = np.repeat(th[en_g], cg)
+                sp = (np.repeat(self.inicio[nh[en_g]] - np.cumsum(cg) + cg, cg)
+                      + np.arange(cg.sum()))
+                v = vel_segmentos(puntos[tp], self.A[sp], self.B[sp], self.G[sp],
+                                  self.tol_nucleo)
+                for c in range(3):
+                    acum[0, c] += np.bincount(tp, v[:, c], minlength=n)
+                    acum[1, c] += np.bincount(tp, v[:, c] * self.estela[sp], minlength=n)
+
+            # Nodos internos cercanos: se abren sus hijos
+            abrir = ~lejos & (self.n_hijos[nodo] > 0)
+            hijos = self.hijos[nodo[abrir]]
+            t = np.repeat(t[abrir], self.hijos.shape[1])
+            nodo = hijos.ravel()
+            t, nodo = t[nodo >= 0], nodo[nodo >= 0]
+
+        return acum.reshape(6, n)
+
+    def velocidad_por_bloques(self, puntos, bloque=65536, n=None):
+        """
+        Generador que evalúa `puntos` por bloques. `puntos` puede ser un
+        arreglo (N, 3) (incluido un np.memmap) o una función que recibe
+        (i0, i1) y devuelve los puntos de ese rango; en ese caso n (el
+        número total de puntos) es obligatorio. Entrega
+        (i0, i1, u, v, w, udw, vdw, wdw) por bloque.
+        """
+        if callable(puntos):
+            if n is None:
+                raise ValueError("Con una función de puntos hay que dar n")
+            obtener = puntos
+        else:
+            obtener, n = (lambda i0, i1: puntos[i0:i1]), len(puntos)
+        for i0 in range(0, n, bloque):
+            i1 = min(i0 + bloque, n)
+            yield (i0, i1) + self.velocidad(obtener(i0, i1))
+
+    def velocidad_malla(self, X, Y, Z, bloque=65536, salida=None):
+        """
+        Evalúa la malla cartesiana definida por los ejes X, Y, Z (1D) sin
+        construirla completa: los puntos de cada bloque se generan a partir
+        de sus índices. Si `salida` es un arreglo (6, len(X)*len(Y)*len(Z))
+        (por ejemplo un np.memmap) se escribe en él; si no, se entregan los
+        bloques como en velocidad_por_bloques.
+        """
+        X, Y, Z = (np.asarray(e, dtype=float) for e in (X, Y, Z))
+        forma = (len(X), len(Y), len(Z))
+
+        def obtener(i0, i1):
+            i, j, k = np.unravel_index(np.arange(i0, i1), forma)
+            return np.column_stack([X[i], Y[j], Z[k]])
+
+        bloques = self.velocidad_por_bloques(obtener, bloque, int(np.prod(forma)))
+        if salida is None:
+            return bloques
+        for i0, i1, *vel in bloques:
+            salida[:, i0:i1] = vel
+        return salida